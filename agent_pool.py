@@ -0,0 +1,87 @@
+"""
+Bounded executor for running the (blocking) agent off the event loop.
+
+The agent's tools and the Gemini client are synchronous, so each /invoke runs
+on a dedicated thread pool instead of the uvicorn event loop. Slots are handed
+out on the event loop, so all counters are only touched from there. At most
+AGENT_MAX_IN_FLIGHT runs execute at once, up to AGENT_MAX_QUEUE more may wait
+for a slot, and anything beyond that is rejected immediately so the caller can
+answer with 503 instead of piling up work.
+"""
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+
+AGENT_MAX_IN_FLIGHT = int(os.getenv("AGENT_MAX_IN_FLIGHT", "4"))
+AGENT_MAX_QUEUE = int(os.getenv("AGENT_MAX_QUEUE", "16"))
+AGENT_RETRY_AFTER = int(os.getenv("AGENT_RETRY_AFTER", "5"))
+
+
+class AgentPoolFull(Exception):
+    """Raised when both the running slots and the wait queue are full."""
+
+
+class AgentPool:
+    def __init__(self, max_in_flight=AGENT_MAX_IN_FLIGHT, max_queue=AGENT_MAX_QUEUE):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="agent")
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._pending = 0
+        self._running = 0
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0}
+
+    def is_full(self):
+        return self._pending >= self.max_in_flight + self.max_queue
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Holds one agent slot for the duration of the block, waiting in the
+        queue if all slots are busy. Used directly by natively async agent runs
+        (streaming); run() uses it for the blocking ones. Raises AgentPoolFull
+        without queuing if the pool is saturated.
+        """
+        if self.is_full():
+            self._stats["rejected"] += 1
+            raise AgentPoolFull()
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                self._running += 1
+                outcome = "failed"
+                try:
+                    yield
+                    outcome = "completed"
+                finally:
+                    self._running -= 1
+                    self._stats[outcome] += 1
+        finally:
+            self._pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) on the agent pool's threads and awaits its
+        result. Raises AgentPoolFull without queuing if the pool is saturated.
+        """
+        async with self.slot():
+            loop = asyncio.get_running_loop()
+            # Carry the request's context variables over to the pool thread.
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, partial(context.run, fn, *args, **kwargs))
+
+    def stats(self):
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queued": max(self._pending - self._running, 0),
+            **self._stats,
+        }
+
+
+agent_pool = AgentPool()
@@ -0,0 +1,269 @@
+"""
+Append-only article archive, partitioned by source and date.
+
+Saved articles are appended as NDJSON (one JSON object per line) to
+ARCHIVE_DIR/<source>/<YYYY-MM>/<YYYY-MM-DD>.ndjson[.gz|.zst], so saving never
+rewrites what is already on disk. A sidecar SQLite index of archived URLs
+makes saves idempotent: an article whose URL is already archived is skipped,
+including by other worker processes. Compressed partitions are written as one
+gzip member / zstd frame per save, which readers see as a single stream.
+
+iter_articles() streams a date range back one article at a time, and
+export_json() writes it out as a JSON array, in the format save_articles_json
+writes the articles it was given:
+
+    python -m article_archive export --from 2025-06-01 --to 2025-06-30 [--source dawn] out.json
+
+Configuration:
+    ARCHIVE_DIR          where partitions and the index live ("saved_articles/archive")
+    ARCHIVE_COMPRESSION  "none" (default), "gzip" or "zstd" (needs the zstandard package)
+    EXPORT_DIR           where save_articles_json writes its JSON files ("saved_articles/exports")
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from article_store import infer_source, normalize_date
+
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("saved_articles", "archive"))
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "none").lower()
+# Kept apart from the archive and the article store, which also live under
+# saved_articles/, so an export can never overwrite them.
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join("saved_articles", "exports"))
+
+EXTENSIONS = {"none": ".ndjson", "gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+# Partition of articles whose date could not be parsed.
+UNDATED = "undated"
+
+if ARCHIVE_COMPRESSION not in EXTENSIONS:
+    raise ValueError(f"ARCHIVE_COMPRESSION must be one of {', '.join(EXTENSIONS)}, not '{ARCHIVE_COMPRESSION}'")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd archives need the 'zstandard' package: pip install zstandard") from None
+    return zstandard
+
+
+def record(article, source=None, section=None):
+    """The archived form of a scraped article, in save_articles_json's format plus the section."""
+    url = article.get("url", "")
+    return {
+        "date": normalize_date(article.get("date")) or article.get("date", ""),
+        "title": article.get("title", ""),
+        "content": article.get("content") or article.get("summary") or "",
+        "url": url,
+        "source": article.get("source") or source or infer_source(url),
+        "section": article.get("section") or section,
+        "keywords": article.get("keywords") or [],
+    }
+
+
+def _encode(lines, compression):
+    data = "".join(lines).encode("utf-8")
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        return _zstd().ZstdCompressor().compress(data)
+    return data
+
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        reader = _zstd().ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def export_path(filename):
+    """Path in EXPORT_DIR for a caller-chosen file name; any directory part is dropped."""
+    name = os.path.basename(filename or "")
+    if name in ("", ".", ".."):
+        name = "articles.json"
+    return os.path.join(EXPORT_DIR, name)
+
+
+def write_json(path, articles):
+    """
+    Writes articles to `path` as an indented JSON array one at a time, so an
+    iterator is never held in memory. Returns the number written.
+    """
+    count = 0
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for article in articles:
+            f.write(",\n  " if count else "\n  ")
+            f.write(json.dumps(article, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    return count
+
+
+class ArticleArchive:
+    def __init__(self, directory=ARCHIVE_DIR, compression=ARCHIVE_COMPRESSION):
+        self.directory = directory
+        self.compression = compression
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS archived (
+                    url TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    partition TEXT NOT NULL,
+                    archived_at REAL NOT NULL
+                )
+            """)
+
+    def _partition(self, source, date):
+        month = date[:7] if date != UNDATED else UNDATED
+        return os.path.join(source, month, date + EXTENSIONS[self.compression])
+
+    def append(self, articles, source=None, section=None):
+        """
+        Appends the articles not archived yet and returns (added, skipped).
+        Articles without a URL or title are skipped.
+        """
+        batches = {}
+        skipped = 0
+        now = time.time()
+        with self._lock, self._conn:
+            for article in articles:
+                entry = record(article, source, section)
+                if not entry["url"] or not entry["title"]:
+                    skipped += 1
+                    continue
+                date = normalize_date(entry["date"]) or UNDATED
+                partition = self._partition(entry["source"], date)
+                # The index row is the claim on the URL: whoever inserts it
+                # writes the article, everyone else skips it.
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO archived VALUES (?, ?, ?, ?, ?)",
+                    (entry["url"], entry["source"], date, partition, now),
+                )
+                if cursor.rowcount == 0:
+                    skipped += 1
+                    continue
+                batches.setdefault(partition, []).append(json.dumps(entry, ensure_ascii=False) + "\n")
+
+            for partition, lines in batches.items():
+                path = os.path.join(self.directory, partition)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # One write per partition, so appends from other processes
+                # never interleave inside a line or a compressed frame.
+                with open(path, "ab") as f:
+                    f.write(_encode(lines, self.compression))
+        return sum(len(lines) for lines in batches.values()), skipped
+
+    def contains(self, url):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM archived WHERE url = ?", (url,)).fetchone() is not None
+
+    def partitions(self, start_date=None, end_date=None, source=None):
+        """Paths of the partition files overlapping the range, oldest first."""
+        sources = [source.lower()] if source else sorted(
+            name for name in os.listdir(self.directory)
+            if not name.startswith(".") and os.path.isdir(os.path.join(self.directory, name))
+        )
+        found = []
+        for name in sources:
+            root = os.path.join(self.directory, name)
+            if not os.path.isdir(root):
+                continue
+            for month in sorted(os.listdir(root)):
+                if not os.path.isdir(os.path.join(root, month)):
+                    continue
+                if month != UNDATED and ((start_date and month < start_date[:7]) or (end_date and month > end_date[:7])):
+                    continue
+                for filename in sorted(os.listdir(os.path.join(root, month))):
+                    date = filename.split(".", 1)[0]
+                    if date == UNDATED:
+                        if start_date or end_date:
+                            continue
+                    elif (start_date and date < start_date) or (end_date and date > end_date):
+                        continue
+                    found.append((date, os.path.join(root, month, filename)))
+        return [path for _, path in sorted(found)]
+
+    def iter_articles(self, start_date=None, end_date=None, source=None):
+        """
+        Yields archived articles in the range one at a time, by date, reading
+        one partition line by line. Dates are inclusive "YYYY-MM-DD" strings;
+        undated articles are only included when no range is given.
+        """
+        for path in self.partitions(start_date, end_date, source):
+            with _open_text(path) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def export_json(self, path, start_date=None, end_date=None, source=None):
+        """
+        Writes the articles in the range to `path` as an indented JSON array,
+        streaming them from the partitions. Returns the number written.
+        """
+        return write_json(path, self.iter_articles(start_date, end_date, source))
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM archived").fetchone()[0]
+        partitions = self.partitions()
+        return {
+            "entries": entries,
+            "partitions": len(partitions),
+            "bytes": sum(os.path.getsize(path) for path in partitions),
+            "compression": self.compression,
+        }
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """Returns the process-wide ArticleArchive, opening its index on first use."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ArticleArchive()
+        return _archive
+
+
+def stats():
+    return get_archive().stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export archived articles as a JSON array.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write the articles of a date range to a JSON file.")
+    export.add_argument("--from", dest="start_date", help='First date, "YYYY-MM-DD".')
+    export.add_argument("--to", dest="end_date", help='Last date, "YYYY-MM-DD".')
+    export.add_argument("--source", help='e.g. "dawn", "tribune" or "paradigmshift".')
+    export.add_argument("path")
+    args = parser.parse_args(argv)
+
+    count = get_archive().export_json(args.path, args.start_date, args.end_date, args.source)
+    print(f"Exported {count} articles to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+In-memory cache of parsed articles, bounded by bytes.
+
+Scraped articles are kept between requests so a repeat scrape or a "full" /
+"summary" response skips the page cache read and the parse. Each article is
+held as a compact ArticleRecord rather than a dict: a slotted object whose
+source, section and date strings are interned (shared by every article with
+the same value) and whose content is zlib-compressed once it is long enough
+to be worth it. Editorials vary a lot in length, so the LRU evicts by the
+total size of its records, not by their number.
+
+Configuration:
+    ARTICLE_CACHE_BYTES         memory budget of the cache (64 MB; 0 disables it)
+    ARTICLE_CACHE_COMPRESS      "0" keeps content uncompressed (default "1")
+    ARTICLE_CACHE_COMPRESS_MIN  content shorter than this many bytes is never compressed (1024)
+"""
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+ARTICLE_CACHE_BYTES = int(os.getenv("ARTICLE_CACHE_BYTES", str(64 * 1024 * 1024)))
+ARTICLE_CACHE_COMPRESS = os.getenv("ARTICLE_CACHE_COMPRESS", "1") == "1"
+ARTICLE_CACHE_COMPRESS_MIN = int(os.getenv("ARTICLE_CACHE_COMPRESS_MIN", "1024"))
+
+# Rough cost of one entry in the LRU's OrderedDict, beyond the record itself.
+ENTRY_OVERHEAD = 120
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ArticleRecord:
+    """One article, stored compactly. to_dict() gives back the scraper's dict."""
+
+    __slots__ = ("url", "title", "date", "source", "section", "_content", "expires_at")
+
+    def __init__(self, url, title, content="", date=None, source=None, section=None,
+                 expires_at=None, compress=None):
+        self.url = url
+        self.title = title
+        self.date = _intern(date)
+        self.source = _intern(source)
+        self.section = _intern(section)
+        self.expires_at = expires_at
+        self._content = content or ""
+        if compress is None:
+            compress = ARTICLE_CACHE_COMPRESS
+        if compress and len(self._content) >= ARTICLE_CACHE_COMPRESS_MIN:
+            packed = zlib.compress(self._content.encode("utf-8"))
+            if len(packed) < len(self._content):
+                self._content = packed
+
+    @classmethod
+    def from_dict(cls, article, expires_at=None):
+        return cls(
+            article["url"], article.get("title") or "", article.get("content") or "",
+            date=article.get("date"), source=article.get("source"), section=article.get("section"),
+            expires_at=expires_at,
+        )
+
+    @property
+    def content(self):
+        if isinstance(self._content, bytes):
+            return zlib.decompress(self._content).decode("utf-8")
+        return self._content
+
+    @property
+    def compressed(self):
+        return isinstance(self._content, bytes)
+
+    @property
+    def nbytes(self):
+        # Interned values are shared between records and not counted.
+        return (ENTRY_OVERHEAD + sys.getsizeof(self) + sys.getsizeof(self.url)
+                + sys.getsizeof(self.title) + sys.getsizeof(self._content))
+
+    def to_dict(self):
+        article = {"title": self.title, "content": self.content, "url": self.url, "date": self.date}
+        if self.source is not None:
+            article["source"] = self.source
+        if self.section is not None:
+            article["section"] = self.section
+        return article
+
+
+class ArticleCache:
+    def __init__(self, max_bytes=ARTICLE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._records = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "stored_content_bytes": 0,
+                       "raw_content_bytes": 0}
+
+    def _drop(self, url):
+        record = self._records.pop(url)
+        self._bytes -= record.nbytes
+        return record
+
+    def get(self, url):
+        """Returns the cached article for `url` as a dict, or None."""
+        with self._lock:
+            record = self._records.get(url)
+            if record is not None and record.expires_at is not None and record.expires_at <= time.time():
+                self._drop(url)
+                self._stats["expired"] += 1
+                record = None
+            if record is None:
+                self._stats["misses"] += 1
+                return None
+            self._records.move_to_end(url)
+            self._stats["hits"] += 1
+        return record.to_dict()
+
+    def get_many(self, urls):
+        """Returns {url: article} for the given URLs that are cached."""
+        found = {}
+        for url in urls:
+            article = self.get(url)
+            if article is not None:
+                found[url] = article
+        return found
+
+    def put(self, article, ttl=None):
+        """
+        Caches a scraped article (a dict with at least 'url'). With a ttl in
+        seconds the entry expires, e.g. for pages that may still change.
+        """
+        if self.max_bytes <= 0 or not article.get("url"):
+            return
+        record = ArticleRecord.from_dict(article, expires_at=time.time() + ttl if ttl else None)
+        size = record.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if record.url in self._records:
+                self._drop(record.url)
+            self._records[record.url] = record
+            self._bytes += size
+            self._stats["raw_content_bytes"] += len(article.get("content") or "")
+            self._stats["stored_content_bytes"] += len(record._content)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._records)))
+                self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["entries"] = len(self._records)
+            snapshot["bytes"] = self._bytes
+        snapshot["max_bytes"] = self.max_bytes
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 3) if lookups else 0.0
+        raw = snapshot.pop("raw_content_bytes")
+        stored = snapshot.pop("stored_content_bytes")
+        snapshot["compression_ratio"] = round(raw / stored, 2) if stored else 1.0
+        return snapshot
+
+
+_cache = ArticleCache()
+
+
+def get(url):
+    return _cache.get(url)
+
+
+def get_many(urls):
+    return _cache.get_many(urls)
+
+
+def put(article, ttl=None):
+    _cache.put(article, ttl)
+
+
+def stats():
+    return _cache.stats()
@@ -0,0 +1,108 @@
+"""
+Structured article lists for API responses, built from the agent's tool calls.
+
+Instead of asking Gemini to copy every title and URL into its answer (and then
+guessing at them with json.loads), the articles returned by the scraping and
+search tools are read from the executor's intermediate steps, deduplicated by
+URL, tagged with their source and section, and returned as
+AgentResponse.articles. Each request picks how much of every article to return:
+
+    titles   source, section, date, title and url (the default)
+    summary  the above plus a short summary (cached, see compaction.py)
+    full     the above plus the complete article text from the article cache or store
+"""
+import article_cache
+import article_store
+import compaction
+
+
+PAYLOADS = ("titles", "summary", "full")
+
+# Tools whose articles are listed in the response, with the source and
+# section of their articles when the tool output does not carry them.
+ARTICLE_TOOLS = {
+    "scrape_dawn_articles": ("dawn", "editorial"),
+    "scrape_dawn_opinion_articles": ("dawn", "column"),
+    "scrape_tribune_editorials": ("tribune", "editorial"),
+    "scrape_paradigmshift_articles": ("paradigmshift", None),
+    "scrape_all_sources": (None, None),
+    "search_articles": (None, None),
+}
+
+LISTING_FIELDS = ("source", "section", "date", "title", "url")
+
+
+def articles_from_steps(intermediate_steps):
+    """
+    Returns the articles of every article tool call, in the order the agent
+    saw them, one entry per URL. Later calls fill in fields an earlier call
+    lacked (e.g. the date, which scrape_dawn_articles leaves out).
+    """
+    by_url = {}
+    for action, output in intermediate_steps:
+        if action.tool not in ARTICLE_TOOLS or not isinstance(output, list):
+            continue
+        source, section = ARTICLE_TOOLS[action.tool]
+        for article in output:
+            if not isinstance(article, dict) or not article.get("url") or not article.get("title"):
+                continue
+            tagged = {
+                **article,
+                "source": article.get("source") or source or article_store.infer_source(article["url"]),
+                "section": article.get("section") or section,
+            }
+            known = by_url.setdefault(article["url"], tagged)
+            for key, value in tagged.items():
+                if known.get(key) is None:
+                    known[key] = value
+    return list(by_url.values())
+
+
+def shape(articles, payload="titles"):
+    """
+    Returns the articles with the fields of the given payload. Tool outputs
+    may hold truncated text or summaries, so full content and summaries are
+    made from the complete text in the article cache or store when it is there.
+    """
+    if payload not in PAYLOADS:
+        raise ValueError(f"Unknown payload '{payload}'. Use one of: {', '.join(PAYLOADS)}")
+    shaped = []
+    for article in articles:
+        item = {key: article.get(key) for key in LISTING_FIELDS}
+        if article.get("score") is not None:
+            item["score"] = article["score"]
+        shaped.append(item)
+    if payload == "titles":
+        return shaped
+
+    urls = [article["url"] for article in articles]
+    stored = article_cache.get_many(urls)
+    # Dawn articles are cached without a date (theirs is the listing date,
+    # set on the scraped copies only), so the store fills it in.
+    missing = [url for url in urls if not stored.get(url, {}).get("date")]
+    if missing:
+        for url, row in article_store.get_store().get_many(missing).items():
+            cached = stored.get(url, {})
+            stored[url] = {**row, **{key: value for key, value in cached.items() if value}}
+    full = []
+    for article, item in zip(articles, shaped):
+        row = stored.get(article["url"]) or {}
+        if item["date"] is None:
+            item["date"] = row.get("date")
+        if article.get("compacted"):
+            content = row.get("content") or article.get("content") or ""
+        else:
+            content = article.get("content") or row.get("content") or ""
+        full.append({**article, "content": content})
+
+    if payload == "full":
+        for item, article in zip(shaped, full):
+            item["content"] = article["content"] or article.get("summary") or ""
+        return shaped
+
+    summarized = compaction.compact([a for a in full if a["content"]], "summary")
+    summaries = {a["url"]: a["content"] for a in summarized}
+    for item, article in zip(shaped, full):
+        # Cards (ParadigmShift) come with the outlet's own summary.
+        item["summary"] = summaries.get(article["url"]) or article.get("summary") or ""
+    return shaped
@@ -0,0 +1,213 @@
+"""
+Local article store with a full-text index.
+
+Every article the scrapers fetch is upserted here, keyed by URL, along with its
+source, section and (normalized) date. An FTS5 index over title and content lets
+the agent answer topic and date lookups from disk instead of re-scraping.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+
+ARTICLE_STORE_PATH = os.getenv("ARTICLE_STORE_PATH", os.path.join("saved_articles", "articles.sqlite3"))
+
+DATE_FORMATS = ["%Y-%m-%d", "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d %b %Y"]
+
+
+def normalize_date(value):
+    """
+    Converts the date strings the scrapers produce ("2025-06-05",
+    "June 5, 2025", "Published: June 05, 2025 ...") to "YYYY-MM-DD".
+    Returns None if no date can be found.
+    """
+    if not value:
+        return None
+    value = re.sub(r"\s+", " ", value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    match = re.search(r"([A-Z][a-z]+ \d{1,2}, \d{4})", value) or re.search(r"(\d{4}-\d{2}-\d{2})", value)
+    if match and match.group(1) != value:
+        return normalize_date(match.group(1))
+    return None
+
+
+def infer_source(url: str) -> str:
+    if "dawn.com" in url:
+        return "dawn"
+    elif "tribune.com.pk" in url:
+        return "tribune"
+    elif "paradigmshift.com.pk" in url:
+        return "paradigmshift"
+    else:
+        return "unknown"
+
+
+def _match_expression(query):
+    # Quote every word so user text can't be read as FTS5 syntax.
+    words = re.findall(r"\w+", query or "")
+    return " OR ".join(f'"{word}"' for word in words)
+
+
+class ArticleStore:
+    def __init__(self, path=ARTICLE_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT UNIQUE NOT NULL,
+                    source TEXT,
+                    section TEXT,
+                    date TEXT,
+                    published TEXT,
+                    title TEXT,
+                    content TEXT,
+                    keywords TEXT
+                );
+                CREATE INDEX IF NOT EXISTS articles_date ON articles(date);
+                CREATE INDEX IF NOT EXISTS articles_source_date ON articles(source, date);
+
+                CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                    title, content, content='articles', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                    INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                    INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+                    INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+                    INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+                END;
+            """)
+
+    def save(self, articles, source=None, section=None):
+        """
+        Upserts scraped articles. Each article needs at least 'url' and 'title';
+        'content' falls back to 'summary', and 'source'/'section' fall back to
+        the arguments (or the URL for the source). Articles without a title,
+        such as failed fetches, are skipped. Returns the number written.
+        """
+        rows = []
+        for article in articles:
+            url = article.get("url")
+            if not url or not article.get("title"):
+                continue
+            published = article.get("date")
+            rows.append((
+                url,
+                article.get("source") or source or infer_source(url),
+                article.get("section") or section,
+                normalize_date(published),
+                published,
+                article.get("title"),
+                article.get("content") or article.get("summary") or "",
+                json.dumps(article.get("keywords") or []),
+            ))
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO articles (url, source, section, date, published, title, content, keywords)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    source = excluded.source,
+                    section = COALESCE(excluded.section, articles.section),
+                    date = COALESCE(excluded.date, articles.date),
+                    published = COALESCE(excluded.published, articles.published),
+                    title = excluded.title,
+                    content = CASE WHEN length(excluded.content) >= length(articles.content)
+                                   THEN excluded.content ELSE articles.content END,
+                    keywords = excluded.keywords
+            """, rows)
+        return len(rows)
+
+    def search(self, query=None, start_date=None, end_date=None, source=None, section=None, limit=50):
+        """
+        Searches stored articles. `query` is matched against title and content
+        (any word, ranked by BM25); without a query the newest articles in the
+        date range are returned. Dates are inclusive "YYYY-MM-DD" strings.
+        """
+        clauses = []
+        params = []
+        match = _match_expression(query)
+        if match:
+            sql = """
+                SELECT a.date, a.title, a.url, a.source, a.section,
+                       snippet(articles_fts, 1, '', '', ' ... ', 32) AS snippet
+                FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+                WHERE articles_fts MATCH ?
+            """
+            params.append(match)
+        else:
+            sql = """
+                SELECT a.date, a.title, a.url, a.source, a.section,
+                       substr(a.content, 1, 200) AS snippet
+                FROM articles a WHERE 1 = 1
+            """
+        if start_date:
+            clauses.append("a.date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("a.date <= ?")
+            params.append(end_date)
+        if source:
+            clauses.append("a.source = ?")
+            params.append(source.lower())
+        if section:
+            clauses.append("a.section = ?")
+            params.append(section)
+        for clause in clauses:
+            sql += f" AND {clause}"
+        sql += " ORDER BY bm25(articles_fts) LIMIT ?" if match else " ORDER BY a.date DESC, a.id LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_many(self, urls):
+        """Returns {url: stored article} for the given URLs that are in the store."""
+        urls = list(urls)
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's limit on bound parameters.
+            for i in range(0, len(urls), 500):
+                batch = urls[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT url, source, section, date, published, title, content FROM articles "
+                    f"WHERE url IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update((row["url"], dict(row)) for row in rows)
+        return found
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Returns the process-wide ArticleStore, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+        return _store
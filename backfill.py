@@ -0,0 +1,129 @@
+"""
+Backfill of the article archive for long date ranges.
+
+    python -m backfill --source dawn-column --from 2025-01-01 --to 2025-06-30 [--workers 8]
+
+Days are scraped through the same pipeline as the agent tools, with up to
+`--workers` days and page fetches in flight, and each day's articles are
+appended to the archive (article_archive.py) and the article store as soon as
+the day is complete, so memory stays flat however long the range is.
+
+Progress is kept in a checkpoint file after every day: the last day of the
+range reached, and the days that failed. Running the same command again
+resumes after the checkpoint and retries the failed days; --restart ignores
+it. Archiving skips URLs already archived, so overlapping runs are harmless.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+import article_archive
+import fetch_engine
+from scrapers import iter_days, start_source
+from sources import REGISTRY, get_adapter
+
+
+def checkpoint_path(adapter_name):
+    return os.path.join(article_archive.ARCHIVE_DIR, ".checkpoints", f"{adapter_name}.json")
+
+
+def load_checkpoint(path, adapter_name, start_date, end_date):
+    """Returns the checkpoint of the same job (source and range), or None."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    if (checkpoint.get("source"), checkpoint.get("from"), checkpoint.get("to")) != (adapter_name, start_date, end_date):
+        print(f"Ignoring checkpoint {path}: it is for {checkpoint.get('source')} "
+              f"{checkpoint.get('from')} to {checkpoint.get('to')}")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)
+
+
+def next_day(date_str):
+    return (datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def backfill(adapter, start_date, end_date, workers, checkpoint_file, restart=False):
+    """Scrapes and archives every day of the range; returns (checkpoint, totals)."""
+    archive = article_archive.get_archive()
+    checkpoint = None if restart else load_checkpoint(checkpoint_file, adapter.name, start_date, end_date)
+    checkpoint = checkpoint or {"source": adapter.name, "from": start_date, "to": end_date, "done": None, "failed": []}
+    resume_from = next_day(checkpoint["done"]) if checkpoint["done"] else start_date
+    retry = sorted(checkpoint["failed"])
+    checkpoint["failed"] = []
+    totals = {"days": 0, "articles": 0, "added": 0}
+
+    # Days that failed last time first, one at a time, then the rest of the range.
+    runs = [start_source(adapter, date_str, date_str, window=1) for date_str in retry]
+    if resume_from <= end_date:
+        runs.append(start_source(adapter, resume_from, end_date, window=workers))
+    for units in runs:
+        for date_str, articles in iter_days(adapter, units):
+            if articles is None:
+                checkpoint["failed"].append(date_str)
+            else:
+                added, _ = archive.append(articles, source=adapter.source, section=adapter.section)
+                totals["days"] += 1
+                totals["articles"] += len(articles)
+                totals["added"] += added
+                missing = sum(1 for article in articles if not article.get("title"))
+                print(f"{date_str}: {len(articles)} articles, {added} new" + (f", {missing} failed" if missing else ""))
+                # Articles that failed to download are retried with their day.
+                if missing:
+                    checkpoint["failed"].append(date_str)
+            if date_str not in retry and (checkpoint["done"] is None or date_str > checkpoint["done"]):
+                checkpoint["done"] = date_str
+            save_checkpoint(checkpoint_file, checkpoint)
+    return checkpoint, totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape a long date range of one source into the article archive.")
+    parser.add_argument("--source", required=True, choices=sorted(name for name, a in REGISTRY.items() if a.dated),
+                        help="Dated source section to backfill.")
+    parser.add_argument("--from", dest="start_date", required=True, help='First date, "YYYY-MM-DD".')
+    parser.add_argument("--to", dest="end_date", required=True, help='Last date, "YYYY-MM-DD".')
+    parser.add_argument("--workers", type=int, default=8, help="Days and page fetches in flight at once.")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: under the archive directory).")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from --from.")
+    args = parser.parse_args(argv)
+
+    for value in (args.start_date, args.end_date):
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            parser.error(f'"{value}" is not a "YYYY-MM-DD" date')
+    if args.start_date > args.end_date:
+        parser.error("--from must not be after --to")
+    workers = max(args.workers, 1)
+    fetch_engine.configure(max_workers=workers, per_host_limit=workers)
+
+    adapter = get_adapter(args.source)
+    started = time.perf_counter()
+    checkpoint, totals = backfill(adapter, args.start_date, args.end_date, workers,
+                                  args.checkpoint or checkpoint_path(adapter.name), args.restart)
+    elapsed = time.perf_counter() - started
+    print(f"{totals['days']} days, {totals['articles']} articles ({totals['added']} new) in {elapsed:.1f} s; "
+          f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    if checkpoint["failed"]:
+        print(f"Failed days, retried on the next run: {', '.join(checkpoint['failed'])}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
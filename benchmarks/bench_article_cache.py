@@ -0,0 +1,92 @@
+"""
+Benchmarks the memory of cached articles as plain dicts against ArticleRecords.
+
+For each corpus size the script builds synthetic scraped articles (every dict
+with its own source, section and date strings, as they come out of the
+parsers), measures the heap they take with tracemalloc, then does the same for
+an ArticleCache holding them and reports the cache's own size accounting and
+the cost of a lookup. The synthetic text uses a small vocabulary, so it
+compresses better than real editorials do; use --no-compress for the
+uncompressed lower bound.
+
+    python -m benchmarks.bench_article_cache [--sizes 500 2000] [--no-compress] [--json results.json]
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import article_cache
+from benchmarks import fixtures
+
+
+def scraped(records):
+    # Fresh strings per article, like the values the parsers return.
+    return [{
+        "title": "".join(r["title"]),
+        "content": "".join(r["content"]),
+        "url": "".join(r["url"]),
+        "date": "".join(list(r["date"])),
+        "source": "".join(list("dawn")),
+        "section": "".join(list("editorial")),
+    } for r in records]
+
+
+def heap_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return kept, used
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--no-compress", action="store_true")
+    parser.add_argument("--json", help="Write results to this file as JSON.")
+    args = parser.parse_args(argv)
+    article_cache.ARTICLE_CACHE_COMPRESS = not args.no_compress
+
+    results = []
+    print(f"{'articles':>9}{'dict MB':>10}{'cache MB':>10}{'accounted MB':>14}{'per article KB':>16}{'get us':>9}")
+    for size in args.sizes:
+        records = fixtures.article_records(size)
+        _, dict_bytes = heap_bytes(lambda: scraped(records))
+
+        def fill():
+            # The dicts are dropped once cached, so only what the cache keeps is counted.
+            cache = article_cache.ArticleCache(max_bytes=1 << 40)
+            for article in scraped(records):
+                cache.put(article)
+            return cache
+
+        cache, cache_bytes = heap_bytes(fill)
+        started = time.perf_counter()
+        for record in records:
+            cache.get(record["url"])
+        get_us = (time.perf_counter() - started) / size * 1e6
+        stats = cache.stats()
+        row = {
+            "articles": size,
+            "dict_mb": round(dict_bytes / 2**20, 2),
+            "cache_mb": round(cache_bytes / 2**20, 2),
+            "accounted_mb": round(stats["bytes"] / 2**20, 2),
+            "per_article_kb": round(cache_bytes / size / 1024, 2),
+            "get_us": round(get_us, 1),
+            "compression_ratio": stats["compression_ratio"],
+        }
+        results.append(row)
+        print(f"{size:>9}{row['dict_mb']:>10.2f}{row['cache_mb']:>10.2f}{row['accounted_mb']:>14.2f}"
+              f"{row['per_article_kb']:>16.2f}{row['get_us']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Benchmarks the extraction layer against the original full-tree parsing.
+
+For every page type the legacy code path (BeautifulSoup(..., 'html.parser') over
+the whole document) and the extract.py path are run over the same fixtures.
+The extracted values must be identical; the script exits non-zero otherwise.
+
+    python -m benchmarks.bench_extract [--iterations 20] [--json results.json]
+"""
+import argparse
+import json
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+import extract
+from benchmarks import fixtures
+from sources import get_adapter
+
+
+def legacy_dawn_listing(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    hrefs = []
+    for a_tag in soup.select("article.story a.story__link[href]"):
+        href = a_tag.get("href")
+        if href.startswith("https://www.dawn.com/news/") and href not in hrefs:
+            hrefs.append(href)
+    return hrefs
+
+
+def legacy_dawn_article(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    title_tag = soup.select_one("h1.story__title, h2.story__title")
+    title = title_tag.get_text(strip=True) if title_tag else "No title found"
+    content = "\n".join(p.get_text(strip=True) for p in soup.select(".story__content p"))
+    return title, content.strip()
+
+
+def legacy_tribune_listing(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    links = soup.select('li div.horiz-news3-caption a[href^="https://tribune.com.pk/story/"]')
+    return [link.get('href') for link in links if link.get('href')][:6]
+
+
+def legacy_tribune_article(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    title_tag = soup.select_one('div.story-box-section h1')
+    title = title_tag.get_text(strip=True) if title_tag else None
+    date_tag = soup.select_one('div.left-authorbox span')
+    publish_date = date_tag.get_text(strip=True) if date_tag else None
+    content_div = soup.select_one('span.story-text')
+    content = []
+    if content_div:
+        for p_tag in content_div.find_all('p', recursive=False):
+            for script_or_style in p_tag(['script', 'style', 'div']):
+                script_or_style.decompose()
+            paragraph_text = p_tag.get_text(strip=True)
+            if paragraph_text:
+                content.append(paragraph_text)
+        content = "\n\n".join(content)
+    else:
+        content = ""
+    return title, publish_date, content
+
+
+def legacy_paradigmshift_listing(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    cards = []
+    for card in soup.select('article.ast-article-post')[:3]:
+        title_link_tag = card.select_one('h2.entry-title a')
+        title = title_link_tag.get_text(strip=True) if title_link_tag else None
+        article_url = title_link_tag.get('href') if title_link_tag else None
+        date_tag = card.select_one('div.entry-meta span.published')
+        publish_date = date_tag.get_text(strip=True) if date_tag else None
+        if publish_date:
+            publish_date = re.sub(r'\s+', ' ', publish_date).strip()
+        summary_div = card.select_one('div.ast-excerpt-container')
+        summary = None
+        if summary_div:
+            summary_paragraphs = summary_div.find_all('p', recursive=False)
+            summary = "\n\n".join([p.get_text(strip=True) for p in summary_paragraphs if p.get_text(strip=True)])
+            if not summary:
+                summary = summary_div.get_text(strip=True)
+        if title and article_url:
+            cards.append({"title": title, "date": publish_date, "url": article_url, "summary": summary})
+    return cards
+
+
+DAWN = get_adapter("dawn-editorial")
+TRIBUNE = get_adapter("tribune-editorial")
+PARADIGMSHIFT = get_adapter("paradigmshift-pakistan")
+
+
+def fast_dawn_article(html):
+    article = extract.parse_article(html, DAWN)
+    return article["title"], article["content"]
+
+
+def fast_tribune_article(html):
+    article = extract.parse_article(html, TRIBUNE)
+    return article["title"], article["date"], article["content"]
+
+
+CASES = [
+    ("dawn_listing", [fixtures.dawn_listing("editorial", f"2025-06-0{d}") for d in range(1, 6)],
+     legacy_dawn_listing, lambda html: extract.parse_links(html, DAWN)),
+    ("dawn_article", [fixtures.dawn_article(f"a{i}") for i in range(5)],
+     legacy_dawn_article, fast_dawn_article),
+    ("tribune_listing", [fixtures.tribune_listing(seed=i).encode() for i in range(5)],
+     legacy_tribune_listing, lambda html: extract.parse_links(html, TRIBUNE)[:TRIBUNE.limit]),
+    ("tribune_article", [fixtures.tribune_article(i).encode() for i in range(5)],
+     legacy_tribune_article, fast_tribune_article),
+    ("paradigmshift_listing", [fixtures.paradigmshift_listing("pakistan", seed=i).encode() for i in range(5)],
+     legacy_paradigmshift_listing, lambda html: extract.parse_cards(html, PARADIGMSHIFT)),
+]
+
+
+def time_per_page(fn, pages, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for page in pages:
+            fn(page)
+    return (time.perf_counter() - started) / (iterations * len(pages))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this file as JSON.")
+    args = parser.parse_args(argv)
+
+    results = []
+    mismatches = 0
+    print(f"link parser: {extract.LINK_PARSER}, text parser: {extract.TEXT_PARSER}")
+    print(f"{'page':<24}{'legacy ms':>12}{'fast ms':>12}{'speedup':>10}  identical")
+    for name, pages, legacy, fast in CASES:
+        identical = all(legacy(page) == fast(page) for page in pages)
+        mismatches += not identical
+        legacy_s = time_per_page(legacy, pages, args.iterations)
+        fast_s = time_per_page(fast, pages, args.iterations)
+        results.append({
+            "page": name,
+            "bytes": sum(len(page) for page in pages) // len(pages),
+            "legacy_ms": round(legacy_s * 1000, 3),
+            "fast_ms": round(fast_s * 1000, 3),
+            "speedup": round(legacy_s / fast_s, 2),
+            "identical": identical,
+        })
+        print(f"{name:<24}{legacy_s * 1000:>12.2f}{fast_s * 1000:>12.2f}{legacy_s / fast_s:>9.1f}x  {identical}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"link_parser": extract.LINK_PARSER, "text_parser": extract.TEXT_PARSER, "results": results}, f, indent=2)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Offline end-to-end benchmark of the scraping tools and the /invoke endpoint.
+
+The news sites are replaced by benchmarks.fixture_server (with optional
+injected latency and errors) and Gemini by benchmarks.fake_llm, so the
+production scrapers, caches, agent executor and FastAPI app run with no
+network and no API quota. Every run starts from empty caches in a temporary
+directory. Measured:
+
+- scrape throughput of every tool (articles and pages per second, cold cache)
+- parse time per page type
+- memory high-water mark (peak RSS) of each phase; on Linux the peak is reset
+  between phases, elsewhere it is the process-lifetime peak so far
+  ('peak_rss_scope' in the results says which)
+- /invoke latency percentiles and throughput under concurrent load
+
+    python -m benchmarks.bench_offline [--latency 0.05] [--error-rate 0.02]
+        [--requests 200] [--concurrency 16] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _isolate():
+    """Points every cache and store at a temporary directory before they are imported."""
+    workdir = tempfile.mkdtemp(prefix="bench-offline-")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["ARTICLE_STORE_PATH"] = os.path.join(workdir, "articles.sqlite3")
+    os.environ["PREFETCH_ENABLED"] = "0"
+    # The fixture server is local; set RATE_LIMIT_ENABLED=1 to measure with the limiter.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    return workdir
+
+
+WORKDIR = _isolate()
+
+import httpx  # noqa: E402
+from langchain.agents import AgentExecutor, create_tool_calling_agent  # noqa: E402
+
+import article_cache  # noqa: E402
+import compaction  # noqa: E402
+import http_client  # noqa: E402
+import listing_tracker  # noqa: E402
+import main as agent_main  # noqa: E402
+import page_cache  # noqa: E402
+from benchmarks import bench_extract  # noqa: E402
+from benchmarks.fake_llm import ScriptedChatModel  # noqa: E402
+from benchmarks.fixture_server import FixtureServer, redirect_session  # noqa: E402
+
+
+# Dawn pages for past dates are immutable, so the benchmark works on a fixed
+# past week rather than on today.
+END = (datetime.today() - timedelta(days=7)).date()
+DAYS = [(END - timedelta(days=i)).isoformat() for i in range(6, -1, -1)]
+
+
+TOOL_CASES = [
+    ("scrape_dawn_articles", {"start_date": DAYS[0], "end_date": DAYS[-1]}),
+    ("scrape_dawn_opinion_articles", {"start_date": DAYS[0], "end_date": DAYS[-1]}),
+    ("scrape_tribune_editorials", {}),
+    ("scrape_paradigmshift_articles", {}),
+    ("scrape_all_sources", {"start_date": DAYS[0], "end_date": DAYS[-1]}),
+]
+
+# Load mix: (query, tool calls the fake model makes for it). Queries without
+# tool calls are answered by the query router without the agent.
+SCENARIOS = [
+    (f"articles for {DAYS[-1]}", []),
+    (f"dawn editorials from {DAYS[0]} to {DAYS[-1]}", []),
+    (f"dawn editorials about the economy from {DAYS[2]} to {DAYS[-1]}",
+     [("scrape_dawn_articles", {"start_date": DAYS[2], "end_date": DAYS[-1], "topic": "economy"})]),
+    ("summarize the latest tribune editorials",
+     [("scrape_tribune_editorials", {"detail": "summary"})]),
+    ("what is paradigm shift writing about",
+     [("scrape_paradigmshift_articles", {})]),
+    (f"key points of dawn columns and editorials on {DAYS[-2]}",
+     [("scrape_dawn_opinion_articles", {"start_date": DAYS[-2], "end_date": DAYS[-2], "detail": "summary"}),
+      ("scrape_dawn_articles", {"start_date": DAYS[-2], "end_date": DAYS[-2], "detail": "summary"})]),
+]
+PLANS = dict(SCENARIOS)
+
+
+def reset_peak_rss():
+    """
+    Starts a new peak RSS measurement. Returns False where the peak cannot be
+    reset (anything but Linux), so peak_rss_mb() stays cumulative.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak RSS since the last reset_peak_rss(), or since the process started."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def reset_caches():
+    page_cache._cache = page_cache.PageCache(path=os.path.join(WORKDIR, "cache", f"pages-{time.time_ns()}.sqlite3"))
+    article_cache._cache = article_cache.ArticleCache()
+    listing_tracker._tracker = listing_tracker.ListingTracker(
+        path=os.path.join(WORKDIR, "cache", f"listings-{time.time_ns()}.sqlite3"))
+    agent_main.response_cache._entries.clear()
+
+
+def use_fake_llm(llm_latency):
+    """Rebuilds the agent around the scripted model; summaries use a plan-less one."""
+    agent_llm = ScriptedChatModel(plan=lambda query: PLANS.get(query, []), latency=llm_latency)
+    agent = create_tool_calling_agent(agent_llm, agent_main.tools, agent_main.prompt)
+    agent_main.agent_exec = AgentExecutor(agent=agent, tools=agent_main.tools, return_intermediate_steps=True)
+    compaction.get_compactor()._llm = ScriptedChatModel(latency=llm_latency)
+
+
+def bench_tools():
+    results = []
+    for name, args in TOOL_CASES:
+        reset_caches()
+        tool = next(t for t in agent_main.tools if t.name == name)
+        before = http_client.stats()["requests"]
+        started = time.perf_counter()
+        articles = tool.invoke(args)
+        elapsed = time.perf_counter() - started
+        pages = http_client.stats()["requests"] - before
+        results.append({
+            "tool": name,
+            "articles": len(articles),
+            "pages": pages,
+            "seconds": round(elapsed, 3),
+            "articles_per_s": round(len(articles) / elapsed, 1),
+            "pages_per_s": round(pages / elapsed, 1),
+        })
+    return results
+
+
+def bench_parse(iterations):
+    return [
+        {"page": name, "ms": round(bench_extract.time_per_page(fast, pages, iterations) * 1000, 3)}
+        for name, pages, _, fast in bench_extract.CASES
+    ]
+
+
+async def bench_invoke(requests, concurrency):
+    reset_caches()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async def one(client, i):
+        query = SCENARIOS[i % len(SCENARIOS)][0]
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/invoke", json={"query": query})
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    transport = httpx.ASGITransport(app=agent_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_s": round(requests / elapsed, 1),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        **{f"p{q}_ms": round(percentile(latencies, q) * 1000, 1) for q in (50, 90, 95, 99)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every page response.")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Random +/- seconds on the page latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of page requests answered with 503.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds every fake Gemini call takes.")
+    parser.add_argument("--requests", type=int, default=120)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--no-response-cache", action="store_true",
+                        help="Run every /invoke through the router or agent instead of answering repeats from the response cache.")
+    parser.add_argument("--parse-iterations", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file as JSON.")
+    args = parser.parse_args(argv)
+
+    results = {"config": vars(args), "started": datetime.now().isoformat(timespec="seconds")}
+    with FixtureServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate) as server:
+        redirect_session(server.base_url)
+        use_fake_llm(args.llm_latency)
+        if args.no_response_cache:
+            agent_main.response_cache.max_entries = 0
+
+        results["peak_rss_scope"] = "phase" if reset_peak_rss() else "process"
+        results["parse"] = bench_parse(args.parse_iterations)
+        results["parse_peak_rss_mb"] = peak_rss_mb()
+        print(f"{'page':<24}{'ms':>10}")
+        for row in results["parse"]:
+            print(f"{row['page']:<24}{row['ms']:>10.2f}")
+
+        reset_peak_rss()
+        results["tools"] = bench_tools()
+        results["tools_peak_rss_mb"] = peak_rss_mb()
+        print(f"\n{'tool':<32}{'articles':>9}{'pages':>7}{'s':>8}{'art/s':>8}{'pages/s':>9}")
+        for row in results["tools"]:
+            print(f"{row['tool']:<32}{row['articles']:>9}{row['pages']:>7}{row['seconds']:>8.2f}"
+                  f"{row['articles_per_s']:>8.1f}{row['pages_per_s']:>9.1f}")
+
+        reset_peak_rss()
+        results["invoke"] = asyncio.run(bench_invoke(args.requests, args.concurrency))
+        results["invoke_peak_rss_mb"] = peak_rss_mb()
+        invoke = results["invoke"]
+        print(f"\n/invoke: {invoke['requests']} requests at concurrency {invoke['concurrency']}: "
+              f"{invoke['requests_per_s']} req/s, p50 {invoke['p50_ms']} ms, p90 {invoke['p90_ms']} ms, "
+              f"p99 {invoke['p99_ms']} ms, statuses {invoke['statuses']}")
+        results["server"] = {"requests": server.requests, "injected_errors": server.errors}
+    results["http"] = http_client.stats()
+    print(f"peak RSS ({results['peak_rss_scope']}): parse {results['parse_peak_rss_mb']} MB, "
+          f"tools {results['tools_peak_rss_mb']} MB, /invoke {results['invoke_peak_rss_mb']} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(status == "200" for status in results["invoke"]["statuses"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
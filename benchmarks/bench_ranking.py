@@ -0,0 +1,77 @@
+"""
+Benchmarks pre-filtering topic queries with ranking.py against handing the
+agent every article.
+
+For each corpus size the script ranks synthetic articles for every topic and
+reports the ranker's latency (cold: articles tokenized for the first time;
+warm: term counts already cached, as for articles seen by an earlier query), the prompt tokens of the all-articles payload and
+of the top-k payload, and the share of the top-k that is actually about the
+topic. LLM time is not measured; it is estimated from the token counts with
+--tokens-per-second, the rate at which the model reads prompt tokens.
+
+    python -m benchmarks.bench_ranking [--sizes 100 1000 5000] [--top-k 8] [--json results.json]
+"""
+import argparse
+import json
+import sys
+import time
+
+import ranking
+from benchmarks import fixtures
+from compaction import estimate_tokens
+
+
+def payload_tokens(articles):
+    return estimate_tokens(json.dumps(articles, ensure_ascii=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--top-k", type=int, default=ranking.RANK_TOP_K)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--tokens-per-second", type=float, default=5000)
+    parser.add_argument("--json", help="Write results to this file as JSON.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'articles':>9}{'cold ms':>10}{'warm ms':>10}{'all tokens':>12}{'top-k tokens':>14}{'est. s saved':>14}{'precision':>11}")
+    for size in args.sizes:
+        records = fixtures.article_records(size)
+        articles = [{k: v for k, v in record.items() if k != "topic"} for record in records]
+        topic_of = {record["url"]: record["topic"] for record in records}
+
+        ranking._term_counts.clear()
+        started = time.perf_counter()
+        ranking.rank_articles(articles, "economy", args.top_k)
+        cold_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            ranked = {topic: ranking.rank_articles(articles, topic, args.top_k) for topic in fixtures.TOPIC_WORDS}
+        rank_s = (time.perf_counter() - started) / (args.iterations * len(fixtures.TOPIC_WORDS))
+
+        all_tokens = payload_tokens(articles)
+        top_tokens = sum(payload_tokens(top) for top in ranked.values()) / len(ranked)
+        relevant = sum(topic_of[a["url"]] == topic for topic, top in ranked.items() for a in top)
+        precision = relevant / max(sum(len(top) for top in ranked.values()), 1)
+        saved_s = (all_tokens - top_tokens) / args.tokens_per_second - rank_s
+        results.append({
+            "articles": size,
+            "cold_ms": round(cold_s * 1000, 3),
+            "warm_ms": round(rank_s * 1000, 3),
+            "all_tokens": all_tokens,
+            "top_k_tokens": round(top_tokens),
+            "estimated_seconds_saved": round(saved_s, 3),
+            "precision": round(precision, 3),
+        })
+        print(f"{size:>9}{cold_s * 1000:>10.2f}{rank_s * 1000:>10.2f}{all_tokens:>12}{top_tokens:>14.0f}{saved_s:>14.2f}{precision:>11.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"top_k": args.top_k, "tokens_per_second": args.tokens_per_second, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
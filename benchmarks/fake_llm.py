@@ -0,0 +1,54 @@
+"""
+Deterministic stand-in for ChatGoogleGenerativeAI in offline benchmarks.
+
+ScriptedChatModel answers the agent with scripted tool calls: plan(query)
+returns the tool calls to make for a user query, which are issued one per turn,
+followed by a fixed final answer. Without a plan it behaves like a summarizer
+and returns the first words of its prompt, which is enough for compaction.py.
+"""
+import time
+from typing import Any, Callable, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class ScriptedChatModel(BaseChatModel):
+    # query -> [(tool name, args), ...]
+    plan: Optional[Callable[[str], List[tuple]]] = None
+    final_answer: str = "Here is what I found in the articles."
+    # Seconds each call takes, to stand in for Gemini's response time.
+    latency: float = 0.0
+    summary_words: int = 40
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        human = next((m for m in messages if isinstance(m, HumanMessage)), None)
+        prompt = human.content if human is not None else ""
+        if self.plan is None:
+            text = " ".join(prompt.split()[-self.summary_words:])
+            message = AIMessage(content=text)
+        else:
+            calls = self.plan(prompt)
+            done = sum(isinstance(m, ToolMessage) for m in messages)
+            if done < len(calls):
+                name, args = calls[done]
+                message = AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{done}"}])
+            else:
+                message = AIMessage(content=self.final_answer)
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": len(str(message.content)) // 4,
+            "total_tokens": prompt_tokens + len(str(message.content)) // 4,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,132 @@
+"""
+Local HTTP server standing in for dawn.com, tribune.com.pk and
+paradigmshift.com.pk during offline benchmarks.
+
+Pages are generated by benchmarks.fixtures from the request path, so any date
+range or story id can be served. Latency and errors can be injected to see how
+the scraping layer behaves against slow or flaky sites. redirect_session()
+points the shared http_client session at the server, so the production
+scrapers run unchanged with their real URLs.
+"""
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import http_client
+from benchmarks import fixtures
+
+
+HOSTS = ("www.dawn.com", "tribune.com.pk", "www.paradigmshift.com.pk")
+
+ROUTES = [
+    (re.compile(r"/www\.dawn\.com/newspaper/([\w-]+)/(\d{4}-\d{2}-\d{2})/?$"),
+     lambda m: fixtures.dawn_listing(m.group(1), m.group(2))),
+    (re.compile(r"/www\.dawn\.com/news/([\w-]+)/?$"),
+     lambda m: fixtures.dawn_article(m.group(1))),
+    (re.compile(r"/tribune\.com\.pk/editorial/?$"),
+     lambda m: fixtures.tribune_listing()),
+    (re.compile(r"/tribune\.com\.pk/story/(\d+)/[\w-]*/?$"),
+     lambda m: fixtures.tribune_article(int(m.group(1)))),
+    (re.compile(r"/www\.paradigmshift\.com\.pk/articles/([\w-]+)-articles/?$"),
+     lambda m: fixtures.paradigmshift_listing(m.group(1))),
+    (re.compile(r"/www\.paradigmshift\.com\.pk/([\w-]+)/?$"),
+     lambda m: "<html><body><p>ParadigmShift article</p></body></html>"),
+]
+
+
+class FixtureServer:
+    """
+    Serves fixture pages on 127.0.0.1. Every response is delayed by `latency`
+    seconds (+/- `jitter`), and a share `error_rate` of requests get a 503.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def _handle(self, handler):
+        with self._rng_lock:
+            self.requests += 1
+            delay = max(self.latency + self._rng.uniform(-self.jitter, self.jitter), 0)
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        time.sleep(delay)
+
+        body, status = None, 503 if fail else 404
+        if not fail:
+            path = urlsplit(handler.path).path
+            for pattern, build in ROUTES:
+                match = pattern.match(path)
+                if match:
+                    body, status = build(match).encode("utf-8"), 200
+                    break
+        body = body or b"error"
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _RedirectAdapter(http_client._CountingAdapter):
+    """Sends https://<news host>/path to <base_url>/<news host>/path."""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+
+def redirect_session(base_url):
+    """Mounts the redirect on the shared session for every news host."""
+    session = http_client.get_session()
+    adapter = _RedirectAdapter(base_url, pool_connections=8, pool_maxsize=http_client.POOL_MAXSIZE, max_retries=0)
+    for host in HOSTS:
+        session.mount(f"https://{host}/", adapter)
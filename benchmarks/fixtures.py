@@ -0,0 +1,163 @@
+"""
+Synthetic HTML fixtures shaped like the pages the scrapers read.
+
+The pages carry the same markup the selectors target (listing cards, story
+titles and bodies) surrounded by the things that make real news pages heavy:
+inline scripts, ad slots, navigation menus and related-story widgets. They are
+generated deterministically so benchmark runs are comparable.
+"""
+import random
+
+
+WORDS = (
+    "government economy budget climate court policy province election water "
+    "energy inflation reform education health security trade debt senate "
+    "assembly minister flood growth tax export import power crisis public"
+).split()
+
+
+def _sentence(rng, length=18):
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+
+def _paragraph(rng, sentences=4):
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def _chrome(rng, scripts=40, menu_items=120, ads=15):
+    """Head scripts, navigation and ad slots shared by every page."""
+    head = "".join(
+        f"<script>window.__cfg{i} = {{id: {i}, data: '{'x' * rng.randint(200, 800)}'}};</script>"
+        for i in range(scripts)
+    )
+    nav = "<nav><ul>" + "".join(
+        f'<li class="menu-item"><a href="https://example.com/section/{i}">Section {i}</a></li>'
+        for i in range(menu_items)
+    ) + "</ul></nav>"
+    ad_slots = "".join(
+        f'<div class="ad-slot" id="ad-{i}"><iframe src="https://ads.example.com/{i}"></iframe>'
+        f'<script>googletag.display("ad-{i}");</script></div>'
+        for i in range(ads)
+    )
+    return head, nav, ad_slots
+
+
+def _page(head, body):
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'>{head}</head><body>{body}</body></html>"
+
+
+def dawn_listing(section, date, count=12, seed=0):
+    rng = random.Random(f"dawn-listing-{section}-{date}-{seed}")
+    head, nav, ads = _chrome(rng)
+    cards = []
+    for i in range(count):
+        slug = f"{section}-{date}-{i}"
+        cards.append(
+            f'<article class="story box story--{section}" data-id="{i}">'
+            f'<h2 class="story__title"><a class="story__link" href="https://www.dawn.com/news/{slug}">{_sentence(rng, 8)}</a></h2>'
+            f'<div class="story__excerpt">{_sentence(rng)}</div>'
+            f'<a class="story__link story__link--more" href="https://www.dawn.com/news/{slug}">Read more</a>'
+            f"</article>"
+        )
+    # Promoted stories point outside /news/ and must be skipped.
+    cards.insert(2, '<article class="story"><a class="story__link" href="https://www.dawn.com/trends/promo">Promo</a></article>')
+    return _page(head, nav + ads + "<main>" + "".join(cards) + "</main>" + ads)
+
+
+def dawn_article(slug, paragraphs=12, seed=0):
+    rng = random.Random(f"dawn-article-{slug}-{seed}")
+    head, nav, ads = _chrome(rng)
+    body_paragraphs = "".join(f"<p>{_paragraph(rng)}</p>" for _ in range(paragraphs))
+    related = "".join(
+        f'<article class="story"><h2 class="story__title--related"><a href="https://www.dawn.com/news/r{i}">{_sentence(rng, 6)}</a></h2></article>'
+        for i in range(20)
+    )
+    return _page(head, (
+        nav + ads
+        + f'<div class="story"><h2 class="story__title  text-6xl">  {_sentence(rng, 10)}  </h2>'
+        + f'<div class="story__content  overflow-hidden">{body_paragraphs}'
+        + '<figure><img src="x.jpg"><figcaption>Caption</figcaption></figure>'
+        + f"<p>  {_sentence(rng)} <b>bold</b> tail  </p></div></div>"
+        + f'<aside class="related">{related}</aside>' + ads
+    ))
+
+
+def tribune_listing(count=12, seed=0):
+    rng = random.Random(f"tribune-listing-{seed}")
+    head, nav, ads = _chrome(rng)
+    items = "".join(
+        f'<li><div class="horiz-news3-image"><img src="{i}.jpg"></div>'
+        f'<div class="horiz-news3-caption"><a href="https://tribune.com.pk/story/{1000 + i}/editorial-{i}">{_sentence(rng, 8)}</a>'
+        f"<p>{_sentence(rng)}</p></div></li>"
+        for i in range(count)
+    )
+    return _page(head, nav + ads + f'<ul class="listing">{items}</ul>' + ads)
+
+
+def tribune_article(story_id, paragraphs=10, seed=0):
+    rng = random.Random(f"tribune-article-{story_id}-{seed}")
+    head, nav, ads = _chrome(rng)
+    body = "".join(
+        f"<p>{_paragraph(rng)}<script>track({i});</script><div class=\"inline-ad\">Advertisement</div></p>"
+        if i % 3 == 0 else f"<p>{_paragraph(rng)}</p>"
+        for i in range(paragraphs)
+    )
+    return _page(head, (
+        nav + ads
+        + f'<div class="story-box-section"><h1>{_sentence(rng, 10)}</h1></div>'
+        + '<div class="left-authorbox"><span>Published: June 05, 2025</span><span>Editorial</span></div>'
+        + f'<span class="story-text">{body}<p></p></span>' + ads
+    ))
+
+
+def paradigmshift_listing(section, count=10, seed=0):
+    rng = random.Random(f"paradigmshift-{section}-{seed}")
+    head, nav, ads = _chrome(rng)
+    cards = "".join(
+        f'<article class="ast-article-post post-{i}">'
+        f'<h2 class="entry-title"><a href="https://www.paradigmshift.com.pk/{section}-{i}/">{_sentence(rng, 8)}</a></h2>'
+        f'<div class="entry-meta"><span class="published">June {i + 1},\n   2025</span></div>'
+        f'<div class="ast-excerpt-container"><p>{_sentence(rng)}</p><p>{_sentence(rng)}</p></div>'
+        f"</article>"
+        for i in range(count)
+    )
+    return _page(head, nav + ads + f"<main>{cards}</main>" + ads)
+
+
+FILLER = (
+    "the country said that this year would need a plan for people after months of "
+    "debate while officials and critics agreed many questions remain over the coming weeks"
+).split()
+
+TOPIC_WORDS = {
+    "economy": "inflation imf budget gdp fiscal rupee debt growth tax economic".split(),
+    "climate": "flood floods heatwave emissions monsoon drought environment warming".split(),
+    "politics": "election parliament assembly senate opposition political government".split(),
+    "education": "school schools students university literacy teachers".split(),
+    "health": "hospital polio vaccine disease medical healthcare".split(),
+}
+
+
+def article_records(count, paragraphs=8, seed=0):
+    """
+    Scraped-article dicts, each mostly about one topic of TOPIC_WORDS, with
+    that topic stored under "topic" so rankers can be checked against it.
+    """
+    rng = random.Random(f"articles-{seed}")
+    topics = list(TOPIC_WORDS)
+    records = []
+    for i in range(count):
+        topic = topics[i % len(topics)]
+        vocabulary = TOPIC_WORDS[topic] * 2 + FILLER * 3 + WORDS
+
+        def sentence(length):
+            return " ".join(rng.choice(vocabulary) for _ in range(length)).capitalize() + "."
+
+        records.append({
+            "title": sentence(8),
+            "url": f"https://www.dawn.com/news/{1900000 + i}/article-{i}",
+            "date": f"2025-06-{i % 28 + 1:02d}",
+            "content": "\n".join(" ".join(sentence(18) for _ in range(4)) for _ in range(paragraphs)),
+            "topic": topic,
+        })
+    return records
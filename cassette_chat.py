@@ -0,0 +1,70 @@
+"""
+Chat model side of the cassettes (see cassettes.py): a wrapper recording or
+replaying the calls made to a langchain chat model. Imported by
+cassettes.wrap_llm() only when CASSETTE_MODE is not "off".
+"""
+import re
+import time
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage, messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from cassettes import CASSETTE_MODE, CassetteMiss, _digest, _read, _write
+
+
+def _message_key(message):
+    # Message and tool call ids are random per run, so they are left out.
+    data = {"type": message.type, "content": message.content}
+    if isinstance(message, AIMessage) and message.tool_calls:
+        data["tool_calls"] = [(call["name"], call["args"]) for call in message.tool_calls]
+    if isinstance(message, ToolMessage):
+        data["name"] = message.name
+    if message.type == "system" and isinstance(message.content, str):
+        data["content"] = re.sub(r"\d{4}-\d{2}-\d{2}", "<date>", message.content)
+    return data
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model recording or replaying the calls made to `inner`."""
+
+    inner: Any
+    mode: str = CASSETTE_MODE
+    tools: Optional[list] = None
+    bind_kwargs: dict = {}
+
+    @property
+    def _llm_type(self):
+        return "cassette"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={
+            "tools": [convert_to_openai_tool(tool) for tool in tools],
+            "bind_kwargs": kwargs,
+        })
+
+    def _key(self, messages, stop):
+        model = getattr(self.inner, "model", None) or type(self.inner).__name__
+        return _digest([model, self.tools, stop, [_message_key(m) for m in messages]])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        key = self._key(messages, stop)
+        if self.mode == "replay":
+            entry = _read("llm", key)
+            if entry is None:
+                raise CassetteMiss(f"No recorded chat response for key {key}")
+            message = messages_from_dict([entry["message"]])[0]
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        model = self.inner.bind_tools(self.tools, **self.bind_kwargs) if self.tools else self.inner
+        started = time.perf_counter()
+        message = model.invoke(messages, stop=stop, **kwargs)
+        if self.mode == "record":
+            _write("llm", key, {
+                "messages": messages_to_dict(messages),
+                "message": messages_to_dict([message])[0],
+                "elapsed": round(time.perf_counter() - started, 3),
+            })
+        return ChatResult(generations=[ChatGeneration(message=message)])
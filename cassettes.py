@@ -0,0 +1,165 @@
+"""
+Record/replay of outbound HTTP and Gemini traffic.
+
+With CASSETTE_MODE=record every page the scrapers fetch and every chat model
+request/response pair is written to CASSETTE_DIR while the app runs normally.
+With CASSETTE_MODE=replay they are served back from there without touching
+the network, so the production pipeline (tools, caches, agent executor) can be
+load-tested offline and deterministically. A request with no recording fails
+like a failed fetch or LLM call. CASSETTE_REPLAY_TIMING=1 makes replayed
+responses take as long as the recorded ones did.
+
+HTTP entries are keyed by method and URL; 304s are not recorded. Chat entries are keyed by the model,
+the bound tools and the conversation so far; dates in system prompts are
+masked so a cassette recorded on one day replays on another. The chat model
+wrapper lives in cassette_chat.py.
+
+Configuration is read once at startup:
+    CASSETTE_MODE           "off" (default), "record" or "replay"
+    CASSETTE_DIR            where entries are stored ("cassettes")
+    CASSETTE_REPLAY_TIMING  "1" to replay with the recorded latency
+"""
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "cassettes")
+CASSETTE_REPLAY_TIMING = os.getenv("CASSETTE_REPLAY_TIMING", "0") == "1"
+
+if CASSETTE_MODE not in ("off", "record", "replay"):
+    raise ValueError(f"CASSETTE_MODE must be off, record or replay, not '{CASSETTE_MODE}'")
+
+# Response headers worth keeping; the rest describe the original transfer.
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+
+class CassetteMiss(requests.RequestException):
+    """No recording exists for a request in replay mode. Not retried."""
+
+
+_stats = {"recorded": 0, "replayed": 0, "missing": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _path(kind, key):
+    return os.path.join(CASSETTE_DIR, kind, key[:2], f"{key}.json")
+
+
+def _write(kind, key, entry):
+    path = _path(kind, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write-then-rename so concurrent recorders never leave half a file.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    _count("recorded")
+
+
+def _read(kind, key):
+    try:
+        with open(_path(kind, key), encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        _count("missing")
+        return None
+    _count("replayed")
+    if CASSETTE_REPLAY_TIMING:
+        time.sleep(entry.get("elapsed", 0))
+    return entry
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    Transport adapter recording responses of `inner` (record mode) or serving
+    recorded ones without any network access (replay mode).
+    """
+
+    def __init__(self, inner, mode=CASSETTE_MODE):
+        super().__init__()
+        self.inner = inner
+        self.mode = mode
+
+    def send(self, request, **kwargs):
+        key = _digest([request.method, request.url])
+        if self.mode == "replay":
+            entry = _read("http", key)
+            if entry is None:
+                raise CassetteMiss(f"No recorded response for {request.method} {request.url}", request=request)
+            return self._response(request, entry)
+
+        started = time.perf_counter()
+        response = self.inner.send(request, **kwargs)
+        # A 304 answers a conditional GET of a page recorded earlier; it must
+        # not replace that page's 200, which is what a fresh cache will need.
+        if self.mode == "record" and response.status_code < 500 and response.status_code != 304:
+            _write("http", key, {
+                "method": request.method,
+                "url": request.url,
+                "status": response.status_code,
+                "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+                "encoding": response.encoding,
+                "body": base64.b64encode(response.content).decode("ascii"),
+                "elapsed": round(time.perf_counter() - started, 3),
+            })
+        return response
+
+    @staticmethod
+    def _response(request, entry):
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = base64.b64decode(entry["body"])
+        response.encoding = entry["encoding"]
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+def install(session):
+    """Routes every request of a requests.Session through the cassettes, if enabled."""
+    if CASSETTE_MODE == "off":
+        return session
+    for prefix, adapter in list(session.adapters.items()):
+        if not isinstance(adapter, CassetteAdapter):
+            session.mount(prefix, CassetteAdapter(adapter))
+    return session
+
+
+def wrap_llm(llm):
+    """Returns the chat model wrapped for recording or replay, or unchanged when off."""
+    if CASSETTE_MODE == "off":
+        return llm
+    # langchain's chat model base takes a while to import, so it is only
+    # loaded when cassettes are in use.
+    from cassette_chat import CassetteChatModel
+
+    return CassetteChatModel(inner=llm)
+
+
+def stats():
+    with _stats_lock:
+        return {"mode": CASSETTE_MODE, "dir": CASSETTE_DIR, **_stats}
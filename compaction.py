@@ -0,0 +1,262 @@
+"""
+Compaction of scraped articles before their text reaches the agent.
+
+A week of Dawn editorials and columns is tens of thousands of tokens of article
+content, all of which would land in the agent scratchpad. Tools pass their
+output through compact() instead, which either:
+
+- "full":    keeps the content, truncated to a per-article token budget that
+             shrinks as the number of articles grows, or
+- "summary": replaces the content with a short summary, made with a map-reduce
+             over the article's chunks (summarize every chunk, then combine).
+- "titles":  drops the content altogether.
+
+Summaries are cached on disk by URL and a hash of the content, so an article is
+summarized once and reused by every later "summarize" or "key points" query,
+and summarized again only if its text changes.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cassettes
+from page_cache import CACHE_DIR
+
+
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(CACHE_DIR, "summaries.sqlite3"))
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "models/gemini-2.0-flash")
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
+# Content at or under this many tokens is its own summary.
+SUMMARY_MIN_TOKENS = int(os.getenv("SUMMARY_MIN_TOKENS", "150"))
+# Size of the chunks summarized in the map step.
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+# Budgets for "full" content: per article, and for all articles of one tool call.
+COMPACT_ARTICLE_TOKENS = int(os.getenv("COMPACT_ARTICLE_TOKENS", "1500"))
+COMPACT_TOTAL_TOKENS = int(os.getenv("COMPACT_TOTAL_TOKENS", "12000"))
+# Rough size of a Gemini token in characters of English text.
+CHARS_PER_TOKEN = 4
+
+DETAIL_LEVELS = ("titles", "summary", "full")
+
+MAP_PROMPT = (
+    "Summarize the following part of a news article in 3 to 4 sentences. "
+    "Keep names, figures and the main argument.\n\n{text}"
+)
+REDUCE_PROMPT = (
+    "The following are summaries of consecutive parts of the news article \"{title}\". "
+    "Combine them into a single summary of at most 5 sentences.\n\n{text}"
+)
+
+
+def estimate_tokens(text):
+    return len(text or "") // CHARS_PER_TOKEN
+
+
+def content_hash(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def truncate(text, max_tokens):
+    """
+    Cuts text to about `max_tokens`, at the last paragraph or sentence break
+    that fits, and marks the cut with an ellipsis.
+    """
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    for separator in ("\n", ". "):
+        index = cut.rfind(separator)
+        if index > limit // 2:
+            cut = cut[:index + 1]
+            break
+    return cut.rstrip() + " …"
+
+
+def chunk(text, max_tokens):
+    """Splits text into pieces of at most about `max_tokens`, on paragraph breaks."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    chunks, current = [], ""
+    for paragraph in text.split("\n"):
+        while len(paragraph) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:limit])
+            paragraph = paragraph[limit:]
+        if current and len(current) + len(paragraph) + 1 > limit:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{paragraph}" if current else paragraph
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def _message_text(message):
+    content = message.content
+    if isinstance(content, str):
+        return content.strip()
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content).strip()
+
+
+class SummaryCache:
+    def __init__(self, path=SUMMARY_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    url TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (url, content_hash)
+                )
+            """)
+
+    def get(self, url, digest):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE url = ? AND content_hash = ?", (url, digest)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, url, digest, summary):
+        with self._lock, self._conn:
+            # Older summaries of the same URL are for content that has since changed.
+            self._conn.execute("DELETE FROM summaries WHERE url = ?", (url,))
+            self._conn.execute(
+                "INSERT INTO summaries VALUES (?, ?, ?, ?)", (url, digest, summary, time.time())
+            )
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+
+class Compactor:
+    def __init__(self, cache=None, llm=None, max_workers=SUMMARY_MAX_WORKERS):
+        self.cache = cache if cache is not None else SummaryCache()
+        self._llm = llm
+        self._llm_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary")
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "failures": 0, "llm_calls": 0,
+                       "tokens_in": 0, "tokens_out": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    @property
+    def llm(self):
+        with self._llm_lock:
+            if self._llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                self._llm = cassettes.wrap_llm(ChatGoogleGenerativeAI(model=SUMMARY_MODEL))
+            return self._llm
+
+    def _complete(self, prompt):
+        self._count("llm_calls")
+        return _message_text(self.llm.invoke(prompt))
+
+    def summarize(self, article):
+        """
+        Returns a summary of the article's content, from the cache when the
+        same URL was already summarized with the same content.
+        """
+        content = article.get("content") or ""
+        if estimate_tokens(content) <= SUMMARY_MIN_TOKENS:
+            return content
+        url = article.get("url") or ""
+        digest = content_hash(content)
+        cached = self.cache.get(url, digest)
+        if cached is not None:
+            self._count("hits")
+            return cached
+
+        self._count("misses")
+        partials = [self._complete(MAP_PROMPT.format(text=part)) for part in chunk(content, SUMMARY_CHUNK_TOKENS)]
+        if len(partials) == 1:
+            summary = partials[0]
+        else:
+            summary = self._complete(REDUCE_PROMPT.format(title=article.get("title") or "", text="\n\n".join(partials)))
+        self.cache.put(url, digest, summary)
+        self._count("tokens_in", estimate_tokens(content))
+        self._count("tokens_out", estimate_tokens(summary))
+        return summary
+
+    def _summarized(self, article, fallback_tokens):
+        try:
+            return {**article, "content": self.summarize(article), "compacted": "summary"}
+        except Exception as e:
+            # Better a truncated article than a failed tool call.
+            print(f"Error summarizing {article.get('url')}: {e}")
+            self._count("failures")
+            return {**article, "content": truncate(article["content"], fallback_tokens), "compacted": "truncated"}
+
+    def compact(self, articles, detail="full"):
+        """
+        Returns copies of the articles with their content reduced according to
+        `detail` (one of DETAIL_LEVELS). Articles without content, such as
+        ParadigmShift cards, are returned unchanged apart from "titles".
+        """
+        if detail not in DETAIL_LEVELS:
+            raise ValueError(f"Unknown detail '{detail}'. Use one of: {', '.join(DETAIL_LEVELS)}")
+        with_content = [a for a in articles if a.get("content")]
+        budget = min(COMPACT_ARTICLE_TOKENS, COMPACT_TOTAL_TOKENS // max(len(with_content), 1))
+
+        if detail == "titles":
+            return [{k: v for k, v in a.items() if k not in ("content", "summary")} for a in articles]
+        if detail == "summary":
+            summaries = dict(zip(
+                map(id, with_content),
+                self._executor.map(lambda a: self._summarized(a, budget), with_content),
+            ))
+            return [summaries.get(id(a), a) for a in articles]
+
+        compacted = []
+        for article in articles:
+            content = article.get("content")
+            if content and estimate_tokens(content) > budget:
+                article = {**article, "content": truncate(content, budget), "compacted": "truncated"}
+            compacted.append(article)
+        return compacted
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["entries"] = self.cache.count()
+        snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 3) if lookups else 0.0
+        return snapshot
+
+
+_compactor = None
+_compactor_lock = threading.Lock()
+
+
+def get_compactor():
+    """Returns the process-wide Compactor, opening its cache on first use."""
+    global _compactor
+    with _compactor_lock:
+        if _compactor is None:
+            _compactor = Compactor()
+        return _compactor
+
+
+def compact(articles, detail="full"):
+    """Shortcut for get_compactor().compact(...)."""
+    return get_compactor().compact(articles, detail)
+
+
+def stats():
+    return get_compactor().stats()
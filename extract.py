@@ -0,0 +1,115 @@
+"""
+HTML extraction for every scraper, driven by the selectors of a SourceAdapter
+(see sources.py).
+
+Each page is parsed with the adapter's SoupStrainer so only the subtrees the
+selectors need (listing cards, title, story body) are built, instead of a full
+tree of scripts, ads and navigation. Pages we only read links from are parsed with
+lxml when it is installed. Pages we read text from default to html.parser:
+lxml repairs markup such as <div> inside <p> differently, which would change
+the extracted text. Both can be overridden with LINK_PARSER / TEXT_PARSER.
+"""
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    FAST_PARSER = "lxml"
+except ImportError:
+    FAST_PARSER = "html.parser"
+
+
+LINK_PARSER = os.getenv("LINK_PARSER", FAST_PARSER)
+TEXT_PARSER = os.getenv("TEXT_PARSER", "html.parser")
+
+
+def has_class(*names):
+    """
+    SoupStrainer attribute matcher for tags carrying any of the given classes.
+    Class attributes are not split into lists until after straining, so match
+    against the raw value.
+    """
+    def matches(value):
+        if not value:
+            return False
+        values = value.split() if isinstance(value, str) else value
+        return any(name in values for name in names)
+    return matches
+
+
+def _soup(html, parser, strainer):
+    return BeautifulSoup(html, parser, parse_only=strainer) if strainer is not None else BeautifulSoup(html, parser)
+
+
+def parse_links(html, adapter):
+    """
+    Returns the article links on a listing page that match the adapter's link
+    selector and prefix, in page order and without duplicates.
+    """
+    soup = _soup(html, LINK_PARSER, adapter.listing_strainer)
+    hrefs = []
+    for a_tag in soup.select(adapter.link_selector):
+        href = a_tag.get("href")
+        if href and href.startswith(adapter.link_prefix) and href not in hrefs:
+            hrefs.append(href)
+    return hrefs
+
+
+def parse_article(html, adapter):
+    """Returns a dict with the 'title', 'date' and 'content' of an article page."""
+    soup = _soup(html, TEXT_PARSER, adapter.article_strainer)
+    title_tag = soup.select_one(adapter.title_selector) if adapter.title_selector else None
+    title = title_tag.get_text(strip=True) if title_tag else adapter.missing_title
+    date_tag = soup.select_one(adapter.date_selector) if adapter.date_selector else None
+    publish_date = date_tag.get_text(strip=True) if date_tag else None
+
+    paragraphs = []
+    for element in soup.select(adapter.content_selector) if adapter.content_selector else []:
+        for unwanted in element(list(adapter.content_drop_tags)):
+            unwanted.decompose()
+        text = element.get_text(strip=True)
+        if text or not adapter.skip_empty_paragraphs:
+            paragraphs.append(text)
+    content = adapter.content_separator.join(paragraphs).strip()
+    return {"title": title, "date": publish_date, "content": content}
+
+
+def parse_cards(html, adapter):
+    """
+    Returns the first `adapter.limit` article cards of a listing page as dicts
+    with 'title', 'date', 'url' and 'summary'. Cards without a title link are
+    left out.
+    """
+    soup = _soup(html, TEXT_PARSER, adapter.listing_strainer)
+    cards = []
+    for card in soup.select(adapter.card_selector)[:adapter.limit]:
+        # Title and URL
+        title_link_tag = card.select_one(adapter.card_link_selector)
+        title = title_link_tag.get_text(strip=True) if title_link_tag else None
+        article_url = title_link_tag.get('href') if title_link_tag else None
+
+        # Date
+        date_tag = card.select_one(adapter.card_date_selector) if adapter.card_date_selector else None
+        publish_date = date_tag.get_text(strip=True) if date_tag else None
+        if publish_date:
+            publish_date = re.sub(r'\s+', ' ', publish_date).strip()
+
+        # Summary
+        summary_div = card.select_one(adapter.card_summary_selector) if adapter.card_summary_selector else None
+        summary = None
+        if summary_div:
+            summary_paragraphs = summary_div.find_all('p', recursive=False)
+            summary = "\n\n".join([p.get_text(strip=True) for p in summary_paragraphs if p.get_text(strip=True)])
+            if not summary:
+                summary = summary_div.get_text(strip=True)
+
+        if title and article_url:
+            cards.append({
+                "title": title,
+                "date": publish_date,
+                "url": article_url,
+                "summary": summary
+            })
+    return cards
@@ -0,0 +1,88 @@
+"""
+Bounded-concurrency fetch engine used by the scraper tools.
+
+All page fetches are run on one process-wide thread pool. On top of the global
+worker limit each host gets its own semaphore, so a range scrape can fan out
+without opening dozens of simultaneous connections to a single site.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "6"))
+
+
+class FetchEngine:
+    def __init__(self, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT):
+        self.per_host_limit = per_host_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _run(self, url, fn, args):
+        with self._slot(url):
+            return fn(url, *args)
+
+    def submit(self, url, fn, *args):
+        """
+        Schedules fn(url, *args) on the pool and returns a Future.
+        At most `per_host_limit` calls for the same host run at once.
+        The call, and the Future's done callbacks, see the caller's context
+        variables (e.g. its request trace).
+        """
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = self._run(url, fn, args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        self._executor.submit(contextvars.copy_context().run, run)
+        return future
+
+    def map(self, urls, fn, *args):
+        """
+        Runs fn over every url concurrently and returns the results in input order.
+        """
+        futures = [self.submit(url, fn, *args) for url in urls]
+        return [future.result() for future in futures]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Returns the process-wide FetchEngine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = FetchEngine()
+        return _engine
+
+
+def configure(max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT):
+    """
+    Replaces the process-wide FetchEngine with one of the given size, e.g.
+    for a batch job. Fetches already submitted finish on the old one.
+    """
+    global _engine
+    with _engine_lock:
+        _engine = FetchEngine(max_workers=max_workers, per_host_limit=per_host_limit)
+        return _engine
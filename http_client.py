@@ -0,0 +1,182 @@
+"""
+Process-wide pooled HTTP client shared by every scraper.
+
+One requests.Session keeps connections alive per host, every request gets a
+connect/read timeout and first waits for the host's rate limit (see
+rate_limiter.py), and 429/5xx responses or connection errors are retried
+with exponential backoff and jitter. Connection counters show how many requests
+went over a reused connection versus a freshly opened one.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib.parse import urlsplit
+
+import cassettes
+import rate_limiter
+import telemetry
+
+
+USER_AGENT = os.getenv(
+    "SCRAPER_USER_AGENT",
+    "Mozilla/5.0 (compatible; DawnNewsScraperAgent/1.0)",
+)
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "10"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Replayed responses never reach the sites, so they are not rate limited.
+RATE_LIMITED = rate_limiter.RATE_LIMIT_ENABLED and cassettes.CASSETTE_MODE != "replay"
+
+_counters = {"requests": 0, "new_connections": 0, "retries": 0, "errors": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _counters_lock:
+        _counters[name] += amount
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _count("new_connections")
+        started = time.perf_counter()
+        super().connect()
+        telemetry.observe_connect(self.host, started, time.perf_counter() - started)
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _count("new_connections")
+        started = time.perf_counter()
+        super().connect()
+        telemetry.observe_connect(self.host, started, time.perf_counter() - started)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _count("requests")
+        return super().send(request, **kwargs)
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = _CountingAdapter(pool_connections=8, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return cassettes.install(session)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the shared requests.Session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def _retry_after(response):
+    """Seconds asked for by a Retry-After header (delay or HTTP date), or None."""
+    value = (response.headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(attempt, response=None):
+    if response is not None:
+        retry_after = _retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX)
+    delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def get(url, timeout=None, **kwargs):
+    """
+    GETs a URL through the shared session.
+
+    Connection errors, timeouts and 429/5xx responses are retried up to
+    MAX_RETRIES times. The last response is returned as-is (callers still call
+    raise_for_status()), and the last exception is re-raised if every attempt
+    failed to get a response. A 429, or a retried response with Retry-After,
+    also holds off the host for every worker through the rate limiter.
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    session = get_session()
+    host = urlsplit(url).netloc
+    attempt = 0
+    while True:
+        if RATE_LIMITED:
+            rate_limiter.get_limiter().acquire(host)
+        started = time.perf_counter()
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            telemetry.observe_fetch(host, "error", None, started, time.perf_counter() - started)
+            if attempt >= MAX_RETRIES:
+                _count("errors")
+                raise
+            time.sleep(_retry_delay(attempt))
+        else:
+            telemetry.observe_fetch(host, response.status_code, len(response.content), started, time.perf_counter() - started)
+            retry_after = _retry_after(response)
+            throttled = RATE_LIMITED and (
+                response.status_code == 429 or response.status_code in RETRY_STATUSES and retry_after is not None
+            )
+            if throttled:
+                # Every worker holds off the host; a retry from here waits in acquire().
+                rate_limiter.get_limiter().block(host, retry_after if retry_after is not None else _retry_delay(attempt))
+            if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                return response
+            if not throttled:
+                time.sleep(_retry_delay(attempt, response))
+        attempt += 1
+        _count("retries")
+
+
+def stats():
+    """Returns a snapshot of the request and connection counters."""
+    with _counters_lock:
+        snapshot = dict(_counters)
+    snapshot["reused_connections"] = max(snapshot["requests"] - snapshot["new_connections"], 0)
+    return snapshot
@@ -0,0 +1,174 @@
+"""
+Incremental scraping of listing pages that still change during the day.
+
+Past Dawn pages are immutable, but today's pages are not: Tribune's editorial
+page and Dawn's same-day sections fill in through the morning. The tracker
+remembers the article URLs seen on each (source section, date) listing and a
+content hash of every article fetched from one. A listing is re-fetched with a
+conditional GET through the page cache, and when it was downloaded again
+its URLs are compared with the ones seen on it before. Only the articles not
+fetched from that listing yet are downloaded; the others are parsed from their
+copy in the page cache instead of going to the network again.
+
+Articles can still be edited after they are published. With
+INCREMENTAL_REVALIDATE=1, a known article is re-checked once its last check is
+INCREMENTAL_REVALIDATE_AFTER seconds old: the page is revalidated (a 304 when
+the server supports it) and its content hash is compared with the recorded
+one, so edits are picked up and counted.
+
+Configuration:
+    INCREMENTAL_ENABLED           "0" re-fetches every article of a changing listing (default "1")
+    INCREMENTAL_PATH              state database (CACHE_DIR/listings.sqlite3)
+    INCREMENTAL_REVALIDATE        "1" re-checks known articles for edits (default "0")
+    INCREMENTAL_REVALIDATE_AFTER  seconds between re-checks of one article (1800)
+    INCREMENTAL_RETENTION_DAYS    state older than this is dropped (7)
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+INCREMENTAL_ENABLED = os.getenv("INCREMENTAL_ENABLED", "1") == "1"
+INCREMENTAL_PATH = os.getenv("INCREMENTAL_PATH", os.path.join(os.getenv("CACHE_DIR", "cache"), "listings.sqlite3"))
+INCREMENTAL_REVALIDATE = os.getenv("INCREMENTAL_REVALIDATE", "0") == "1"
+INCREMENTAL_REVALIDATE_AFTER = float(os.getenv("INCREMENTAL_REVALIDATE_AFTER", "1800"))
+INCREMENTAL_RETENTION_DAYS = int(os.getenv("INCREMENTAL_RETENTION_DAYS", "7"))
+
+# check() results.
+UNKNOWN = "unknown"
+KNOWN = "known"
+DUE = "due"
+
+
+def content_hash(article):
+    """Hash of the parts of an article an edit changes: its title and text."""
+    text = f"{article.get('title') or ''}\n{article.get('content') or ''}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ListingTracker:
+    def __init__(self, path=INCREMENTAL_PATH, revalidate=INCREMENTAL_REVALIDATE,
+                 revalidate_after=INCREMENTAL_REVALIDATE_AFTER, retention_days=INCREMENTAL_RETENTION_DAYS):
+        self.revalidate = revalidate
+        self.revalidate_after = revalidate_after
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._stats = {"listings": 0, "new_urls": 0, "known_urls": 0, "fetched": 0, "reused": 0,
+                       "revalidated": 0, "edited": 0}
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # One row per URL seen on a listing; hash is set once its article
+            # has been fetched from that listing.
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS listing_urls (
+                    listing TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    hash TEXT,
+                    checked_at REAL,
+                    edits INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (listing, date, url)
+                )
+            """)
+            cutoff = datetime.today() - timedelta(days=retention_days)
+            self._conn.execute("DELETE FROM listing_urls WHERE date < ?", (cutoff.strftime("%Y-%m-%d"),))
+
+    def observe(self, listing, date, urls):
+        """
+        Records the article URLs on a freshly downloaded listing (an adapter
+        name) for `date` and returns the ones not seen on it before, in page
+        order.
+        """
+        now = time.time()
+        new = []
+        with self._lock, self._conn:
+            for url in urls:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO listing_urls (listing, date, url, first_seen) VALUES (?, ?, ?, ?)",
+                    (listing, date, url, now),
+                )
+                if cursor.rowcount:
+                    new.append(url)
+            self._stats["listings"] += 1
+            self._stats["new_urls"] += len(new)
+            self._stats["known_urls"] += len(urls) - len(new)
+        return new
+
+    def check(self, listing, date, url):
+        """
+        UNKNOWN for an article not fetched from the listing yet, DUE for a
+        known one to re-check for edits, KNOWN otherwise.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checked_at FROM listing_urls WHERE listing = ? AND date = ? AND url = ? AND hash IS NOT NULL",
+                (listing, date, url),
+            ).fetchone()
+        if row is None:
+            return UNKNOWN
+        if self.revalidate and row[0] + self.revalidate_after <= time.time():
+            return DUE
+        return KNOWN
+
+    def reused(self):
+        """Counts a known article served from its local copy."""
+        with self._lock:
+            self._stats["reused"] += 1
+
+    def record(self, listing, date, article):
+        """
+        Records the content hash of an article fetched from a listing. Returns
+        True if it differs from the hash recorded earlier, i.e. the article was
+        edited.
+        """
+        digest = content_hash(article)
+        now = time.time()
+        key = (listing, date, article["url"])
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT hash FROM listing_urls WHERE listing = ? AND date = ? AND url = ?", key).fetchone()
+            known = row is not None and row[0] is not None
+            edited = known and row[0] != digest
+            self._conn.execute(
+                "INSERT INTO listing_urls (listing, date, url, first_seen, hash, checked_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(listing, date, url) DO UPDATE SET hash = excluded.hash, "
+                "checked_at = excluded.checked_at, edits = edits + ?",
+                (*key, now, digest, now, int(edited)),
+            )
+            self._stats["revalidated" if known else "fetched"] += 1
+            self._stats["edited"] += int(edited)
+        return edited
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["tracked_articles"] = self._conn.execute(
+                "SELECT COUNT(*) FROM listing_urls WHERE hash IS NOT NULL").fetchone()[0]
+        snapshot["revalidate"] = self.revalidate
+        return snapshot
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker():
+    """Returns the process-wide ListingTracker, opening its database on first use."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = ListingTracker()
+        return _tracker
+
+
+def stats():
+    if not INCREMENTAL_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **get_tracker().stats()}
@@ -236,40 +236,60 @@
 
 
 
+import time
+_import_started = time.perf_counter()
 from datetime import datetime
-today_str = datetime.today().strftime("%Y-%m-%d")
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 from typing import List, Dict
-import re
 
 # Import LangChain components
+# langchain.agents and langchain_google_genai are imported by get_agent_exec(),
+# on first use, as they take most of the app's import time.
 from langchain_core.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain.agents import create_tool_calling_agent, AgentExecutor
 
 # For the scraping tool
-import requests
-from bs4 import BeautifulSoup
+import http_client
+import page_cache
+import article_store
+import article_archive
+import article_cache
+import listing_tracker
+import cassettes
+import article_payload
+import compaction
+from agent_pool import AgentPoolFull, AGENT_RETRY_AFTER, agent_pool
+from prefetch import PREFETCH_ENABLED, scheduler as prefetch_scheduler
+import query_router
+import rate_limiter
+import telemetry
+from ranking import rank_articles
+from response_cache import RESPONSE_TTL_PAST, RESPONSE_TTL_TODAY, make_key, response_cache
+from scrapers import article_listener, coordinator, iter_dates, scrape_source, scrape_sources, scrape_units
+from sources import adapters_for, get_adapter
 
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware # Import CORS middleware
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import List, Dict, Literal, Optional
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
+from contextlib import asynccontextmanager
+import asyncio
+import threading
+from fastapi.responses import Response, StreamingResponse
 
 
 
 # --- Your existing scrape_dawn_articles tool definition ---
 @tool
-def scrape_dawn_articles(start_date=None, end_date=None):
+def scrape_dawn_articles(start_date=None, end_date=None, topic=None, detail="full"):
     """
     Scrapes Dawn articles between given dates, extracts title and content,
     and returns them in JSON format. If no date is given, defaults to today.
@@ -280,6 +300,11 @@ def scrape_dawn_articles(start_date=None, end_date=None):
     Args:
         start_date (str, optional): Format "YYYY-MM-DD". Defaults to today.
         end_date (str, optional): Format "YYYY-MM-DD". Defaults to today.
+        topic (str, optional): For topic requests, e.g. "economy". Only the articles most relevant to it are
+            returned, best first, each with a relevance 'score'.
+        detail (str, optional): How much of each article's content to return. "full" (default) returns the
+            content, shortened for long articles or long ranges; "summary" returns a short summary of each
+            article instead (use for summaries, key points and topics); "titles" returns no content.
     """
     # Default to today if no dates are given
     if start_date is None:
@@ -287,61 +312,16 @@ def scrape_dawn_articles(start_date=None, end_date=None):
     if end_date is None:
         end_date = datetime.today().strftime("%Y-%m-%d")
 
-    def extract_article_text(url):
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            print(f"Failed to fetch the URL: {e}")
-            return {"title": "", "content": "", "url": url}
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        title_tag = soup.select_one("h1.story__title, h2.story__title")
-        title = title_tag.get_text(strip=True) if title_tag else "No title found"
-        content = "\n".join(p.get_text(strip=True) for p in soup.select(".story__content p"))
-        return {"title": title, "content": content.strip(), "url": url}
-
-    def get_top_urls(start_date, end_date):
-        all_urls = []
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-        current = start
-
-        while current <= end:
-            date_str = current.strftime("%Y-%m-%d")
-            page_url = f"https://www.dawn.com/newspaper/editorial/{date_str}"
-            try:
-                response = requests.get(page_url)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-                count = 0
-                for a_tag in soup.select("article.story a.story__link[href]"):
-                    href = a_tag.get("href")
-                    if href.startswith("https://www.dawn.com/news/") and href not in all_urls:
-                        all_urls.append(href)
-                        count += 1
-                    if count == 3:
-                        break
-            except requests.RequestException as e:
-                print(f"[{date_str}] Failed to fetch: {e}")
-            current += timedelta(days=1)
-        return all_urls
-
-    # Fetch article URLs
-    urls = get_top_urls(start_date, end_date)
-
-    # Extract article data
-    articles = [extract_article_text(url) for url in urls]
-
-    return articles
-
-from langchain.agents import tool
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+    try:
+        articles = scrape_source(get_adapter("dawn-editorial"), start_date, end_date)
+        for article in articles:
+            del article["date"]
+        return compaction.compact(rank_articles(articles, topic), detail)
+    except ValueError as e:
+        return str(e)
 
 @tool
-def scrape_dawn_opinion_articles(start_date=None, end_date=None):
+def scrape_dawn_opinion_articles(start_date=None, end_date=None, topic=None, detail="full"):
     """
     Scrapes Dawn opinion articles between given dates, extracts title and content,
     and returns them in JSON format. If no date is given, defaults to today.
@@ -352,6 +332,11 @@ def scrape_dawn_opinion_articles(start_date=None, end_date=None):
     Args:
         start_date (str, optional): Format "YYYY-MM-DD". Defaults to today.
         end_date (str, optional): Format "YYYY-MM-DD". Defaults to today.
+        topic (str, optional): For topic requests, e.g. "economy". Only the articles most relevant to it are
+            returned, best first, each with a relevance 'score'.
+        detail (str, optional): How much of each article's content to return. "full" (default) returns the
+            content, shortened for long articles or long ranges; "summary" returns a short summary of each
+            article instead (use for summaries, key points and topics); "titles" returns no content.
     """
     # Default to today if no dates are given
     if start_date is None:
@@ -359,58 +344,10 @@ def scrape_dawn_opinion_articles(start_date=None, end_date=None):
     if end_date is None:
         end_date = datetime.today().strftime("%Y-%m-%d")
 
-    def extract_article_text(url, date):
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            print(f"Failed to fetch the URL: {e}")
-            return {"title": "", "content": "", "url": url, "date": date}
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        title_tag = soup.select_one("h1.story__title, h2.story__title")
-        title = title_tag.get_text(strip=True) if title_tag else "No title found"
-        content = "\n".join(p.get_text(strip=True) for p in soup.select(".story__content p"))
-        return {"title": title, "content": content.strip(), "url": url, "date": date}
-
- 
-        
-
-    def get_top_urls(start_date, end_date):
-        all_urls = []
-        date_url_map = []
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-        current = start
-
-        while current <= end:
-            date_str = current.strftime("%Y-%m-%d")
-            page_url = f"https://www.dawn.com/newspaper/column/{date_str}"
-            try:
-                response = requests.get(page_url)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-                count = 0
-                for a_tag in soup.select("article.story a.story__link[href]"):
-                    href = a_tag.get("href")
-                    if href.startswith("https://www.dawn.com/news/") and href not in all_urls:
-                        all_urls.append(href)
-                        date_url_map.append((href, date_str))
-                        count += 1
-                    if count == 4:
-                        break
-            except requests.RequestException as e:
-                print(f"[{date_str}] Failed to fetch: {e}")
-            current += timedelta(days=1)
-        return date_url_map
-
-    # Fetch article URLs with dates
-    urls_with_dates = get_top_urls(start_date, end_date)
-
-    # Extract article data with date
-    articles = [extract_article_text(url, date) for url, date in urls_with_dates]
-
-    return articles
+    try:
+        return compaction.compact(rank_articles(scrape_source(get_adapter("dawn-column"), start_date, end_date), topic), detail)
+    except ValueError as e:
+        return str(e)
 
 
 from typing import List, Dict
@@ -418,93 +355,35 @@ from typing import List, Dict
 @tool
 def save_articles_json(articles: List[Dict], filename: str = "articles.json") -> str:
     """
-    Saves a list of article dictionaries to a JSON file in the specified format.
-    Each article should have at least 'date', 'title', 'content' or 'summary', and 'url'.
-    Adds an empty 'keywords' list and a 'source' key (determined from the URL) to each article.
+    Saves a list of article dictionaries to the local article archive and
+    writes exactly those articles to a JSON file in saved_articles/exports. Each article should have at
+    least 'date', 'title', 'content' or 'summary', and 'url'. Articles saved
+    before are not archived twice, so saving overlapping lists is safe.
     Returns the path to the saved file.
     """
-    def infer_source(url: str) -> str:
-        if "dawn.com" in url:
-            return "dawn"
-        elif "tribune.com.pk" in url:
-            return "tribune"
-        elif "paradigmshift.com.pk" in url:
-            return "paradigmshift"
-        else:
-            return "unknown"
-
-    formatted = []
-    for article in articles:
-        content_or_summary = article.get("content") or article.get("summary") or ""
-        url = article.get("url", "")
-        source = article.get("source") or infer_source(url)
-        formatted.append({
-            "date": article.get("date", ""),
-            "title": article.get("title", ""),
-            "content": content_or_summary,
-            "url": url,
-            "source": source,
-            "keywords": []
-        })
-    os.makedirs("saved_articles", exist_ok=True)
-    file_path = os.path.join("saved_articles", filename)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(formatted, f, ensure_ascii=False, indent=2)
-    return f"Articles saved to {file_path}"
+    added, skipped = article_archive.get_archive().append(articles)
+    file_path = article_archive.export_path(filename)
+    count = article_archive.write_json(file_path, (article_archive.record(a) for a in articles))
+    return f"Articles saved to {file_path} ({added} new, {skipped} already saved; {count} articles in the file)"
 
 
 @tool
-def scrape_tribune_editorials():
+def scrape_tribune_editorials(topic=None, detail="full"):
     """
     Scrapes the top 6 editorial articles from the first page of The Express Tribune.
     Returns a list of dicts, each with 'title', 'date', 'content', and 'url'.
-    """
-    base_url = "https://tribune.com.pk/editorial"
-    articles = []
 
-    # Get top 6 editorial URLs from the first page
+    Args:
+        topic (str, optional): For topic requests, e.g. "economy". Only the articles most relevant to it are
+            returned, best first, each with a relevance 'score'.
+        detail (str, optional): How much of each article's content to return. "full" (default) returns the
+            content, shortened for long articles or long ranges; "summary" returns a short summary of each
+            article instead (use for summaries, key points and topics); "titles" returns no content.
+    """
     try:
-        response = requests.get(base_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        links = soup.select('li div.horiz-news3-caption a[href^="https://tribune.com.pk/story/"]')
-        urls = [link.get('href') for link in links if link.get('href')][:6]
-    except Exception as e:
-        print(f"Error fetching editorial URLs: {e}")
-        return []
-
-    # Scrape each article
-    for url in urls:
-        try:
-            resp = requests.get(url)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.content, 'html.parser')
-            title_tag = soup.select_one('div.story-box-section h1')
-            title = title_tag.get_text(strip=True) if title_tag else None
-            date_tag = soup.select_one('div.left-authorbox span')
-            publish_date = date_tag.get_text(strip=True) if date_tag else None
-            content_div = soup.select_one('span.story-text')
-            content = []
-            if content_div:
-                paragraphs = content_div.find_all('p', recursive=False)
-                for p_tag in paragraphs:
-                    for script_or_style in p_tag(['script', 'style', 'div']):
-                        script_or_style.decompose()
-                    paragraph_text = p_tag.get_text(strip=True)
-                    if paragraph_text:
-                        content.append(paragraph_text)
-                content = "\n\n".join(content)
-            else:
-                content = ""
-            articles.append({
-                "title": title,
-                "date": publish_date,
-                "content": content,
-                "url": url
-            })
-        except Exception as e:
-            print(f"Error scraping article {url}: {e}")
-    return articles
+        return compaction.compact(rank_articles(scrape_source(get_adapter("tribune-editorial")), topic), detail)
+    except ValueError as e:
+        return str(e)
 
 
 @tool
@@ -513,57 +392,63 @@ def scrape_paradigmshift_articles() -> list:
     Scrapes the top 3 articles from both the 'International Relations' and 'Pakistan' sections of Paradigm Shift.
     Returns a list of dicts, each with 'section', 'title', 'date', 'url', and 'summary'.
     """
-    sections = {
-        "International Relations": "https://www.paradigmshift.com.pk/articles/international-relations-articles/",
-        "Pakistan": "https://www.paradigmshift.com.pk/articles/pakistan-articles/"
-    }
     all_articles = []
+    for adapter in adapters_for(["paradigmshift"]):
+        for card in scrape_source(adapter):
+            all_articles.append({"section": adapter.section, **card})
+    return all_articles
 
-    for section_name, url in sections.items():
-        try:
-            response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            article_cards = soup.select('article.ast-article-post')[:3]
-            for card in article_cards:
-                # Title and URL
-                title_link_tag = card.select_one('h2.entry-title a')
-                title = title_link_tag.get_text(strip=True) if title_link_tag else None
-                article_url = title_link_tag.get('href') if title_link_tag else None
-
-                # Date
-                date_tag = card.select_one('div.entry-meta span.published')
-                publish_date = date_tag.get_text(strip=True) if date_tag else None
-                if publish_date:
-                    publish_date = re.sub(r'\s+', ' ', publish_date).strip()
-
-                # Summary
-                summary_div = card.select_one('div.ast-excerpt-container')
-                summary = None
-                if summary_div:
-                    summary_paragraphs = summary_div.find_all('p', recursive=False)
-                    summary = "\n\n".join([p.get_text(strip=True) for p in summary_paragraphs if p.get_text(strip=True)])
-                    if not summary:
-                        summary = summary_div.get_text(strip=True)
-
-                if title and article_url:
-                    all_articles.append({
-                        "section": section_name,
-                        "title": title,
-                        "date": publish_date,
-                        "url": article_url,
-                        "summary": summary
-                    })
-        except Exception as e:
-            print(f"Error scraping section {section_name}: {e}")
 
-    return all_articles
+@tool
+def scrape_all_sources(start_date: Optional[str] = None, end_date: Optional[str] = None, sources: Optional[List[str]] = None, topic: Optional[str] = None, detail: str = "full") -> list:
+    """
+    Scrapes several news sources at once, in parallel, and returns one merged list.
+    Use this when the user does not name a specific section or outlet, instead of calling each scraping tool in turn.
+    Each article is a dict with 'source', 'section', 'title', 'url', 'date' and either 'content' or 'summary'.
+    Dawn sections are scraped for every day in the date range; Tribune and ParadigmShift return their latest articles.
 
+    Args:
+        start_date (str, optional): Format "YYYY-MM-DD". Defaults to today.
+        end_date (str, optional): Format "YYYY-MM-DD". Defaults to today.
+        sources (list of str, optional): Any of "dawn", "dawn-editorial", "dawn-column", "tribune",
+            "paradigmshift", "paradigmshift-international-relations", "paradigmshift-pakistan". Defaults to all.
+        topic (str, optional): For topic requests, e.g. "economy". Only the articles most relevant to it are
+            returned, best first, each with a relevance 'score'.
+        detail (str, optional): How much of each article's content to return. "full" (default) returns the
+            content, shortened for long articles or long ranges; "summary" returns a short summary of each
+            article instead (use for summaries, key points and topics); "titles" returns no content.
+    """
+    try:
+        adapters = adapters_for(sources)
+        return compaction.compact(rank_articles(scrape_sources(adapters, start_date, end_date), topic), detail)
+    except ValueError as e:
+        return str(e)
 
-llm = ChatGoogleGenerativeAI(model="models/gemini-2.0-flash")
+
+@tool
+def search_articles(query: str = "", start_date: Optional[str] = None, end_date: Optional[str] = None, source: Optional[str] = None) -> list:
+    """
+    Searches articles that have already been scraped and stored locally, without going to the network.
+    Use this for questions about articles seen before (e.g. "the article on the IMF you showed me last week")
+    or for date ranges too long to scrape. For topic requests about specific dates (e.g. "economy articles
+    from last 3 days"), scrape those dates with the scraping tools and their 'topic' argument instead: the
+    store may hold only some of the sections or days of a range.
+    Returns a list of dicts with 'date', 'title', 'url', 'source', 'section' and a matching 'snippet'.
+
+    Args:
+        query (str, optional): Topic or keywords to look for in titles and content. Empty returns all articles in the range.
+        start_date (str, optional): Format "YYYY-MM-DD".
+        end_date (str, optional): Format "YYYY-MM-DD".
+        source (str, optional): One of "dawn", "tribune" or "paradigmshift".
+    """
+    return article_store.get_store().search(query, start_date=start_date, end_date=end_date, source=source)
+
+
+# Built on first use by get_agent_exec().
+llm = None
 # tools = [scrape_dawn_articles]
 # tools = [scrape_dawn_articles, scrape_dawn_opinion_articles]
-tools = [scrape_dawn_articles, scrape_dawn_opinion_articles, scrape_tribune_editorials,scrape_paradigmshift_articles , scrape_paradigmshift_articles, save_articles_json]
+tools = [scrape_dawn_articles, scrape_dawn_opinion_articles, scrape_tribune_editorials,scrape_paradigmshift_articles , scrape_paradigmshift_articles, save_articles_json, search_articles, scrape_all_sources]
 
 # prompt = ChatPromptTemplate.from_messages([
 #     ("system", """You are a helpful assistant specialized in scraping and analyzing news articles from the Dawn newspaper editorial  and Opinion section.
@@ -600,7 +485,7 @@ tools = [scrape_dawn_articles, scrape_dawn_opinion_articles, scrape_tribune_edit
 
 
 prompt = ChatPromptTemplate.from_messages([
-    ("system", f"""You are a helpful assistant specialized in scraping and analyzing news articles from the Dawn newspaper's Editorial and Opinion (Column) sections.
+    ("system", """You are a helpful assistant specialized in scraping and analyzing news articles from the Dawn newspaper's Editorial and Opinion (Column) sections.
 Your primary function is to process user requests related to news articles and their content.
 
 **TOOLS AVAILABLE:**
@@ -609,34 +494,38 @@ Your primary function is to process user requests related to news articles and t
 - 'scrape_tribune_editorials': Use for The Tribune News Editorials/Articles
 - 'scrape_paradigmshift_articles':Use for ParadigmShift Articles
 - 'save_articles_json': If the user requests to save articles as a JSON file, use this tool after scraping.
+- 'search_articles': Searches already-scraped articles stored locally by topic, date range and source. No scraping needed.
+- 'scrape_all_sources': Scrapes Dawn (Editorial and Opinion), Tribune and ParadigmShift in parallel in one call.
 
 **WHEN TO USE EACH TOOL:**
 - Use 'scrape_dawn_articles' for requests about the Dawn Editorial section.
 - Use 'scrape_dawn_opinion_articles' for requests about the Dawn Opinion or Column section.
 - Use 'scrape_tribune_editorials' for requests about the Tribune Editorial section.
 - Use 'scrape_paradigmshift_articles' for requests about the ParadigmShift Editorial section.
+- For topic-specific requests, scrape the requested dates with the 'topic' argument. Use 'search_articles' only for articles seen before or for date ranges too long to scrape.
+- For summaries, key points or topics, call the scraping tools with detail="summary"; for plain lists of titles and URLs use detail="titles".
 - Use 'save_articles_json' to save json after getting the articles\
-- If the user does not specify a section, give articles from both section and also tell which article is from which section
+- If the user does not specify a section, give articles from both section and also tell which article is from which section. Use 'scrape_all_sources' for this instead of calling each scraping tool separately.
 
 **IMPORTANT DATE FORMATTING:**
 When using either tool, always ensure that 'start_date' and 'end_date' arguments are provided in the **"YYYY-MM-DD" format**.
 If the user provides relative dates (e.g., "yesterday", "today", "last week", "June 5th"), you MUST first convert these into their exact "YYYY-MM-DD" calendar dates before calling the tool.
 Today's date is {today_str}. Use this knowledge for relative date calculations.
 
-When listing articles, you MUST include every article you receive from the tool. Do NOT omit, summarize, or skip any articles. Always present the full list exactly as provided by the tool, unless the user specifically asks for a subset or summary.
+The articles returned by the tools are sent to the user separately as a structured list with their titles, URLs, sources and sections. Do NOT copy titles and URLs into your answer as a list; write only the prose the user asked for (summaries, key points, explanations), referring to articles by title where needed. For a plain listing request, reply with one short sentence saying how many articles were found for which dates and sections.
 
 **Conditional Behavior for Article Processing:**
-- **Default Action (when only dates are provided):** If the user's request consists *only* of a date or a date range (e.g., "articles for June 10", "news from 2025-06-05 to 2025-06-07") **AND contains NO other specific output instructions** (e.g., "summarize", "provide urls", "list headlines", "find key points", "show vocabulary", etc.), you MUST scrape the articles and return a list of all article **titles along with their URLs** for that time period. Do NOT include summaries, vocabulary, idioms, or anything else unless explicitly asked.
+- **Default Action (when only dates are provided):** If the user's request consists *only* of a date or a date range (e.g., "articles for June 10", "news from 2025-06-05 to 2025-06-07") **AND contains NO other specific output instructions** (e.g., "summarize", "provide urls", "list headlines", "find key points", "show vocabulary", etc.), you MUST scrape the articles for that time period with detail="titles"; their titles and URLs reach the user through the structured list, so your answer is only the one-sentence count described above. Do NOT include summaries, vocabulary, idioms, or anything else unless explicitly asked.
 
 - **Specific Request Priority:** If the user provides *any* specific instruction or requests a particular type of information about the articles (e.g., "I just want the URLs", "summarize the articles", "find key points", "list headlines", "show topics", "give vocabulary words", "show idioms"), you MUST prioritize and fulfill *only* that specific request. Do NOT provide any other information (e.g., vocabulary, phrases, summaries, or links) unless it is explicitly requested.
 
 - **Topic-Specific Requests:** If the user asks for article information (e.g., titles, URLs, summaries) related to a **specific topic** (e.g., "economy", "climate", "politics", "society issues") within a **specific date or date range**, you MUST:
-    1. Scrape all articles for the given time period using the appropriate tool.
-    2. Filter them based on relevance to the requested topic.
-    3. Return only those articles that match the topic.
-    - If the user requests **URLs**, only return the links of the topic-relevant articles.
+    1. Scrape all articles for the given time period using the appropriate tool, passing the topic as 'topic'.
+    2. The tool returns only the relevant articles with a relevance 'score'; drop any that are clearly off-topic.
+    3. Base your answer only on the articles that match the topic.
+    - If the user requests **URLs** or titles, reply with one short sentence saying how many topic-relevant articles were found; the links reach the user through the structured list.
     - If the user requests **summaries**, summarize only the relevant articles.
-    - If no specific instruction is provided, return **article titles with their URLs** related to the topic.
+    - If no specific instruction is provided, reply with one short sentence saying how many articles on the topic were found for which dates.
     - If no date or range is specified, default to the **last three (3) days**, and explicitly state that this is the range being used.
 
 **Section Restriction:**
@@ -650,15 +539,67 @@ When listing articles, you MUST include every article you receive from the tool.
 ])
 
 
-agent = create_tool_calling_agent(llm, tools, prompt)
-agent_exec = AgentExecutor(agent=agent, tools=tools, verbose=True)
+agent_exec = None
+_agent_lock = threading.Lock()
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "1") == "1"
+
+
+def current_date():
+    """Today's date as "YYYY-MM-DD", read per request so it rolls over at midnight."""
+    return datetime.today().strftime("%Y-%m-%d")
+
+
+def get_agent_exec():
+    """
+    Returns the agent executor, creating the Gemini client, the agent and the
+    executor on first use.
+    """
+    global llm, agent_exec
+    with _agent_lock:
+        if agent_exec is None:
+            started = time.perf_counter()
+            from langchain.agents import AgentExecutor, create_tool_calling_agent
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            llm = cassettes.wrap_llm(ChatGoogleGenerativeAI(model="models/gemini-2.0-flash"))
+            agent = create_tool_calling_agent(llm, tools, prompt)
+            agent_exec = AgentExecutor(agent=agent, tools=tools, verbose=True, return_intermediate_steps=True)
+            telemetry.observe_startup("agent_build", time.perf_counter() - started)
+        return agent_exec
+
+
+def invoke_agent_exec(inputs, config=None):
+    return get_agent_exec().invoke(inputs, config=config)
+
+
+def warm_up():
+    try:
+        get_agent_exec()
+    except Exception as e:
+        # The first request will try again and report the error.
+        print(f"Error warming up the agent: {e}")
 
 
 # --- FastAPI Application Setup ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the latest articles warm in the background while the app is up.
+    if PREFETCH_ENABLED:
+        prefetch_scheduler.start()
+    # Build the agent in the background instead of at import or on the first
+    # request; a request arriving before it is ready waits for it.
+    warmup = asyncio.create_task(asyncio.to_thread(warm_up)) if AGENT_WARMUP else None
+    yield
+    if warmup is not None:
+        await warmup
+    await prefetch_scheduler.stop()
+
+
 app = FastAPI(
     title="Dawn News Scraper Agent",
     description="An AI agent that scrapes and analyzes articles from Dawn newspaper editorial section.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -674,78 +615,346 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allow all HTTP methods (GET, POST, etc.)
     allow_headers=["*"], # Allow all headers (like Content-Type)
+    expose_headers=["X-Request-ID"],
 )
+# Request IDs and per-request latency spans, see telemetry.py.
+app.add_middleware(telemetry.RequestTelemetryMiddleware)
+telemetry.configure_logging()
 
 class AgentQuery(BaseModel):
     query: str = Field(..., description="The natural language query for the agent.")
+    payload: Literal["titles", "summary", "full"] = Field(
+        "titles",
+        description="What to include for each article in 'articles': titles and URLs only, "
+                    "a short summary as well, or the full article text.",
+    )
 
 class AgentResponse(BaseModel):
     response: str
     articles: Optional[List[Dict]] = Field(None, description="List of scraped articles if applicable.")
 
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "20"))
+# Queries of one batch answered at once; a request may ask for fewer.
+BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM", "4"))
+
+class BatchQuery(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_QUERIES,
+                               description="The natural language queries, answered in this order.")
+    payload: Literal["titles", "summary", "full"] = Field("titles", description="As for /invoke, for every query.")
+    parallelism: Optional[int] = Field(None, ge=1, description="Most queries to answer at once.")
+
+class BatchItem(BaseModel):
+    query: str
+    response: Optional[AgentResponse] = None
+    error: Optional[str] = Field(None, description="Why the query failed; the other queries are unaffected.")
+
+class BatchResponse(BaseModel):
+    results: List[BatchItem]
+    scraped_units: int = Field(..., description="(source section, date) units scraped up front for the batch.")
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Dawn News Scraper Agent API. Use the /invoke endpoint to interact with the agent."}
 
-@app.post("/invoke", response_model=AgentResponse)
-async def invoke_agent(query_body: AgentQuery):
+@app.get("/stats")
+async def stats():
     """
-    Invokes the LangChain agent with the provided natural language query.
+    Returns runtime counters for the scraping layer.
     """
-    try:
-        # The agent.invoke method returns a dictionary
-        # agent_result = agent_exec.invoke({"input": query_body.query})
-        agent_result = agent_exec.invoke({
-            "input": query_body.query,
-            "today_str": today_str
-        })
-        # The output of the agent is typically in agent_result['output']
-        # The tool output might also be part of the scratchpad, or directly available
-        # if the agent's final answer is just the tool output.
-
-        # If the agent directly returns the articles (e.g., if the user asked for URLs),
-        # we can try to parse them. Otherwise, we'll just return the agent's text output.
-        # This part might need refinement based on how your agent's final output looks.
-
-        # A common pattern is for the agent's 'output' to be the text response.
-        # If the tool directly provides a list of articles, you might need to
-        # inspect agent_result to see if that data is present.
-        
-        # For simplicity, let's assume the agent's primary text output is in 'output'
-        # and we can potentially extract article data if the query was for scraping directly.
-        
-        # Check if the last tool call was 'scrape_dawn_articles' and if its output
-        # is part of the final response, or if the agent explicitly returned it.
-        
-        articles_data = None
-        # A more robust way would be to inspect agent_result['intermediate_steps']
-        # if you want to extract tool outputs specifically.
-        # For now, we'll try to infer if the primary output is text or structured articles.
+    return {"http": http_client.stats(), "page_cache": page_cache.stats(), "agent_pool": agent_pool.stats(), "response_cache": response_cache.stats(), "scrape_coordinator": coordinator.stats(), "summaries": compaction.stats(), "router": query_router.stats(), "cassettes": cassettes.stats(), "startup": telemetry.startup(), "archive": article_archive.stats(), "article_cache": article_cache.stats(), "rate_limiter": rate_limiter.stats(), "incremental": listing_tracker.stats()}
 
-        # If the agent is instructed to just scrape and provide articles,
-        # its 'output' might be a string representation of the articles, or
-        # it might include them in the `agent_result` directly if configured.
-        
-        # Let's try to parse the output if it looks like JSON from the tool.
-        # This is a bit of a heuristic. A better way would be to define a specific
-        # output structure from your agent.
-        
-        output_content = agent_result.get('output', '')
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics: request, agent iteration, tool, LLM, fetch, connect
+    and parse latency histograms, and LLM token counts.
+    """
+    body, content_type = telemetry.metrics()
+    return Response(body, media_type=content_type)
+
+@app.get("/prefetch/status")
+async def prefetch_status():
+    """
+    Returns the background prefetch schedule with the last run, duration and
+    number of items fetched for every source.
+    """
+    return prefetch_scheduler.status()
+
+def response_ttl(intermediate_steps, today):
+    """
+    Picks how long an agent answer may be cached. Answers built only from
+    past-dated Dawn pages are stable; anything that touched today's pages or
+    the live Tribune/ParadigmShift index pages expires quickly.
+    """
+    for action, _ in intermediate_steps:
+        tool_input = action.tool_input if isinstance(action.tool_input, dict) else {}
+        if action.tool in ("scrape_dawn_articles", "scrape_dawn_opinion_articles", "search_articles"):
+            end_date = tool_input.get("end_date") or today
+            if end_date >= today:
+                return RESPONSE_TTL_TODAY
+        elif action.tool != "save_articles_json":
+            return RESPONSE_TTL_TODAY
+    return RESPONSE_TTL_PAST
+
+
+async def run_agent_query(query, payload, today):
+    """
+    Runs the agent for one query and returns (AgentResponse, cache ttl).
+    """
+    # The agent.invoke method returns a dictionary
+    # agent_result = agent_exec.invoke({"input": query_body.query})
+    # The agent and its tools block, so run them on the bounded agent pool
+    # instead of the event loop.
+    agent_result = await agent_pool.run(invoke_agent_exec, {
+        "input": query,
+        "today_str": today
+    }, config={"callbacks": telemetry.callbacks()})
+    # Summaries and full text may need the store and Gemini; keep them off the loop.
+    return await asyncio.to_thread(build_response, agent_result, payload, today)
+
+
+async def answer_query(query, payload, today):
+    """
+    Answers plain date/section listing queries directly from the scrapers and
+    hands everything else to the agent. Returns (AgentResponse, cache ttl).
+    """
+    matched = query_router.route(query, today) if query_router.ROUTER_ENABLED else None
+    if matched is None:
+        return await run_agent_query(query, payload, today)
+    return await answer_listing(matched, payload, today)
+
+
+async def answer_listing(matched, payload, today):
+    """
+    Scrapes the sources and dates of a routed query and returns the titles and
+    URLs of their articles as (AgentResponse, cache ttl).
+    """
+    def scrape():
+        articles, seen = [], set()
+        for article in scrape_sources(matched.adapters, matched.start_date, matched.end_date):
+            if article["url"] not in seen and article.get("title"):
+                seen.add(article["url"])
+                articles.append(article)
+        return article_payload.shape(articles, payload)
+
+    listing = await asyncio.to_thread(scrape)
+    past = matched.end_date < today and all(adapter.dated for adapter in matched.adapters)
+    response = AgentResponse(
+        response=query_router.format_listing(listing, matched.start_date, matched.end_date),
+        articles=listing,
+    )
+    return response, RESPONSE_TTL_PAST if past else RESPONSE_TTL_TODAY
+
+
+def build_response(agent_result, payload, today):
+    """
+    Turns the agent executor's result into (AgentResponse, cache ttl). The
+    articles come straight from the tool outputs in the intermediate steps;
+    the agent's own output is only the prose part of the answer.
+    """
+    output_content = agent_result.get('output', '')
+    intermediate_steps = agent_result.get("intermediate_steps", [])
+    articles_data = article_payload.articles_from_steps(intermediate_steps)
+    if articles_data:
+        articles_data = article_payload.shape(articles_data, payload)
+        final_response_text = output_content
+    else:
+        articles_data = None
+        # Without article tool calls, the agent may still have answered with
+        # a JSON list of articles.
         try:
             parsed_output = json.loads(output_content)
             if isinstance(parsed_output, list) and all(isinstance(item, dict) and "title" in item for item in parsed_output):
                 articles_data = parsed_output
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, TypeError):
             pass # Not JSON, treat as regular text response
-        
-        # If articles_data is still None, it means the agent's primary output
-        # was text, not structured articles.
         final_response_text = output_content if not articles_data else "Articles scraped successfully."
 
+    ttl = response_ttl(agent_result.get("intermediate_steps", []), today)
+    return AgentResponse(response=final_response_text, articles=articles_data), ttl
 
-        return AgentResponse(response=final_response_text, articles=articles_data)
 
+@app.post("/invoke", response_model=AgentResponse)
+async def invoke_agent(query_body: AgentQuery):
+    """
+    Invokes the LangChain agent with the provided natural language query.
+    Identical queries for the same date are answered from the response cache,
+    and concurrent identical queries share a single agent run.
+    """
+    today = current_date()
+    try:
+        return await response_cache.get_or_compute(
+            make_key(query_body.query, today, query_body.payload),
+            lambda: answer_query(query_body.query, query_body.payload, today),
+        )
+    except AgentPoolFull:
+        raise HTTPException(
+            status_code=503,
+            detail="The agent is busy, please retry shortly.",
+            headers={"Retry-After": str(AGENT_RETRY_AFTER)},
+        )
     except Exception as e:
         # Log the full exception for debugging in production
         print(f"Error invoking agent: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
+
+
+@app.post("/invoke/batch", response_model=BatchResponse)
+async def invoke_agent_batch(batch: BatchQuery):
+    """
+    Answers several queries in one call, e.g. the section listings and topic
+    summaries of a digest. The sources and dates the queries name are scraped
+    once for the whole batch first, so the queries' own scrapes are served from
+    the caches; the queries then run through the response cache and agent pool
+    as for /invoke, at most BATCH_PARALLELISM at a time. Results are in input
+    order, and a failed query only fails its own item.
+    """
+    today = current_date()
+    units = {}
+    for query in batch.queries:
+        # Answers that are cached or already being computed need no scraping.
+        if response_cache.contains(make_key(query, today, batch.payload)):
+            continue
+        plan = query_router.scrape_plan(query, today)
+        if plan is None:
+            continue
+        for adapter in plan.adapters:
+            for date_str in iter_dates(plan.start_date, plan.end_date) if adapter.dated else [None]:
+                units[(adapter.name, date_str)] = (adapter, date_str)
+    if units:
+        try:
+            await asyncio.to_thread(scrape_units, list(units.values()))
+        except Exception as e:
+            # Each query scrapes what it still needs and reports its own errors.
+            print(f"Error scraping for the batch: {e}")
+
+    semaphore = asyncio.Semaphore(min(batch.parallelism or BATCH_PARALLELISM, BATCH_PARALLELISM))
+
+    async def answer(query):
+        async with semaphore:
+            try:
+                response = await response_cache.get_or_compute(
+                    make_key(query, today, batch.payload),
+                    lambda: answer_query(query, batch.payload, today),
+                )
+            except AgentPoolFull:
+                return BatchItem(query=query, error="The agent is busy, please retry shortly.")
+            except Exception as e:
+                print(f"Error invoking agent for batch query {query!r}: {e}")
+                return BatchItem(query=query, error=f"Internal server error: {e}")
+        return BatchItem(query=query, response=response)
+
+    results = await asyncio.gather(*(answer(query) for query in batch.queries))
+    return BatchResponse(results=results, scraped_units=len(units))
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def chunk_text(content):
+    # Gemini may stream a message's content as a list of parts.
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+@app.post("/invoke/stream")
+async def invoke_agent_stream(query_body: AgentQuery):
+    """
+    Same as /invoke, but streams progress as Server-Sent Events while the agent
+    works instead of answering once it is done:
+
+    - start: sent immediately
+    - tool_start / tool_end: a tool call began / finished
+    - article: one scraped article, as soon as it is available
+    - token: a piece of the final answer as Gemini generates it
+    - done: the complete AgentResponse
+    - error: the run failed; no further events follow
+    """
+    if agent_pool.is_full():
+        raise HTTPException(
+            status_code=503,
+            detail="The agent is busy, please retry shortly.",
+            headers={"Retry-After": str(AGENT_RETRY_AFTER)},
+        )
+    today = current_date()
+    key = make_key(query_body.query, today, query_body.payload)
+
+    async def events():
+        yield sse("start", {"query": query_body.query})
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield sse("done", cached.model_dump())
+            return
+
+        matched = query_router.route(query_body.query, today) if query_router.ROUTER_ENABLED else None
+        if matched is not None:
+            started = time.perf_counter()
+            try:
+                response, ttl = await answer_listing(matched, query_body.payload, today)
+            except Exception as e:
+                print(f"Error streaming listing: {e}")
+                yield sse("error", {"detail": f"Internal server error: {e}"})
+                return
+            response_cache.put(key, response, ttl, time.perf_counter() - started)
+            yield sse("done", response.model_dump())
+            return
+
+        queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        def on_article(adapter, article):
+            # Called from the tool threads.
+            event = {"source": adapter.source, "section": adapter.section, **article}
+            loop.call_soon_threadsafe(queue.put_nowait, ("article", event))
+
+        async def run():
+            article_listener.set(on_article)
+            started = time.perf_counter()
+            try:
+                async with agent_pool.slot():
+                    executor = await asyncio.to_thread(get_agent_exec)
+                    agent_result = {}
+                    async for event in executor.astream_events(
+                        {"input": query_body.query, "today_str": today}, version="v2",
+                        config={"callbacks": telemetry.callbacks()},
+                    ):
+                        kind = event["event"]
+                        if kind == "on_tool_start":
+                            queue.put_nowait(("tool_start", {"tool": event["name"], "input": event["data"].get("input")}))
+                        elif kind == "on_tool_end":
+                            output = event["data"].get("output")
+                            count = len(output) if isinstance(output, list) else None
+                            queue.put_nowait(("tool_end", {"tool": event["name"], "articles": count}))
+                        elif kind == "on_chat_model_stream":
+                            text = chunk_text(event["data"]["chunk"].content)
+                            if text:
+                                queue.put_nowait(("token", {"text": text}))
+                        elif kind == "on_chain_end" and not event.get("parent_ids"):
+                            agent_result = event["data"]["output"]
+                response, ttl = await asyncio.to_thread(build_response, agent_result, query_body.payload, today)
+                response_cache.put(key, response, ttl, time.perf_counter() - started)
+                queue.put_nowait(("done", response.model_dump()))
+            except AgentPoolFull:
+                queue.put_nowait(("error", {"detail": "The agent is busy, please retry shortly."}))
+            except Exception as e:
+                print(f"Error streaming agent: {e}")
+                queue.put_nowait(("error", {"detail": f"Internal server error: {e}"}))
+            finally:
+                queue.put_nowait(None)
+
+        task = asyncio.create_task(run())
+        try:
+            while (item := await queue.get()) is not None:
+                yield sse(*item)
+        finally:
+            # Stop the agent if the client went away mid-stream.
+            task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+# Measured from the top of this module; get_agent_exec() and the first request
+# report their own startup phases.
+telemetry.observe_startup("import", time.perf_counter() - _import_started)
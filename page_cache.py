@@ -0,0 +1,205 @@
+"""
+Persistent HTTP page cache backed by SQLite.
+
+Pages are keyed by URL. Immutable pages (Dawn listing and article pages for a
+past date) are served from disk forever once fetched. Everything else is kept
+for a TTL and, once stale, revalidated with If-None-Match / If-Modified-Since
+so an unchanged page costs a 304 instead of a full download. The cache is
+bounded by total size and evicts the least recently used pages first.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import http_client
+
+
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(CACHE_DIR, "pages.sqlite3"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PAGE_TTL = int(os.getenv("PAGE_TTL", "300"))
+ARTICLE_TTL = int(os.getenv("ARTICLE_TTL", str(6 * 60 * 60)))
+
+
+class CachedResponse:
+    """
+    The parts of requests.Response the scrapers use, for a page served from
+    (or just stored in) the cache. Only 200 responses are cached, so
+    raise_for_status() never raises.
+    """
+
+    def __init__(self, url, content, encoding, from_cache):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.encoding = encoding
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def raise_for_status(self):
+        pass
+
+
+class PageCache:
+    def __init__(self, path=PAGE_CACHE_PATH, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    content BLOB NOT NULL,
+                    encoding TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages(last_access)")
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _lookup(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, encoding, etag, last_modified, expires_at FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is not None:
+                with self._conn:
+                    self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+        return row
+
+    def _store(self, url, response, expires_at):
+        content = response.content
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    content,
+                    response.encoding or response.apparent_encoding,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    now,
+                    expires_at,
+                    now,
+                    len(content),
+                ),
+            )
+            self._stats["stores"] += 1
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT url, size FROM pages ORDER BY last_access").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            self._stats["evictions"] += 1
+
+    def _refresh(self, url, expires_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET expires_at = ?, fetched_at = ? WHERE url = ?",
+                (expires_at, time.time(), url),
+            )
+
+    def peek(self, url):
+        """Returns the cached copy of `url` however old it is, or None; never fetches."""
+        row = self._lookup(url)
+        if row is None:
+            return None
+        self._count("hits")
+        return CachedResponse(url, row[0], row[1], from_cache=True)
+
+    def get(self, url, immutable=False, ttl=PAGE_TTL, revalidate=False):
+        """
+        Returns the page at `url`, from the cache when possible.
+
+        With immutable=True a cached copy never expires. Otherwise a copy is
+        fresh for `ttl` seconds and is then revalidated with a conditional GET;
+        revalidate=True does that even while it is fresh. Non-200 responses are
+        returned unchanged and are never cached.
+        """
+        expires_at = None if immutable else time.time() + ttl
+        row = self._lookup(url)
+        headers = {}
+        if row is not None:
+            content, encoding, etag, last_modified, cached_expiry = row
+            if not revalidate and (cached_expiry is None or cached_expiry > time.time()):
+                self._count("hits")
+                return CachedResponse(url, content, encoding, from_cache=True)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = http_client.get(url, headers=headers)
+        if response.status_code == 304 and row is not None:
+            self._count("revalidated")
+            self._refresh(url, expires_at)
+            return CachedResponse(url, content, encoding, from_cache=True)
+
+        self._count("misses")
+        if response.status_code != 200:
+            return response
+        self._store(url, response, expires_at)
+        return CachedResponse(url, response.content, response.encoding or response.apparent_encoding, from_cache=False)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        lookups = snapshot["hits"] + snapshot["revalidated"] + snapshot["misses"]
+        snapshot["entries"] = entries
+        snapshot["bytes"] = size
+        snapshot["hit_rate"] = round((snapshot["hits"] + snapshot["revalidated"]) / lookups, 3) if lookups else 0.0
+        return snapshot
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide PageCache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache()
+        return _cache
+
+
+def get(url, immutable=False, ttl=PAGE_TTL, revalidate=False):
+    """Shortcut for get_cache().get(...)."""
+    return get_cache().get(url, immutable=immutable, ttl=ttl, revalidate=revalidate)
+
+
+def peek(url):
+    """Shortcut for get_cache().peek(...)."""
+    return get_cache().peek(url)
+
+
+def stats():
+    return get_cache().stats()
@@ -0,0 +1,115 @@
+"""
+Background prefetching of the latest articles ahead of user traffic.
+
+While the app is running, every registered source is re-scraped on its own
+schedule (today's listing for dated sources, the current listing otherwise).
+The pages land in the page cache and the articles in the article store, so the
+first user request of the day is served warm instead of paying a cold scrape.
+
+Configuration:
+    PREFETCH_ENABLED      "0" disables the scheduler (default "1")
+    PREFETCH_INTERVAL     default seconds between runs of a source (1800)
+    PREFETCH_SCHEDULE     per-source overrides, e.g. "tribune-editorial=600,dawn-column=900"
+    PREFETCH_JITTER       random +/- fraction applied to every interval (0.1)
+    PREFETCH_CONCURRENCY  sources scraped at the same time (2)
+"""
+import asyncio
+import os
+import random
+import time
+from datetime import datetime
+
+from scrapers import scrape_source
+from sources import REGISTRY
+
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "1800"))
+PREFETCH_SCHEDULE = os.getenv("PREFETCH_SCHEDULE", "")
+PREFETCH_JITTER = float(os.getenv("PREFETCH_JITTER", "0.1"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+
+
+def parse_schedule(spec, default_interval):
+    """
+    Returns {adapter name: interval seconds} for every registered source,
+    applying "name=seconds" overrides from a comma-separated spec. An interval
+    of 0 disables prefetching for that source.
+    """
+    schedule = {name: default_interval for name in REGISTRY}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        if name not in REGISTRY:
+            raise ValueError(f"Unknown source '{name}' in PREFETCH_SCHEDULE")
+        schedule[name] = float(seconds)
+    return schedule
+
+
+class PrefetchScheduler:
+    def __init__(self, schedule=None, jitter=PREFETCH_JITTER, concurrency=PREFETCH_CONCURRENCY):
+        if schedule is None:
+            schedule = parse_schedule(PREFETCH_SCHEDULE, PREFETCH_INTERVAL)
+        self.schedule = {name: interval for name, interval in schedule.items() if interval > 0}
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self._tasks = []
+        self._semaphore = None
+        self._status = {
+            name: {"interval": interval, "runs": 0, "last_run": None, "last_duration": None,
+                   "last_items": None, "last_error": None, "next_run": None}
+            for name, interval in self.schedule.items()
+        }
+
+    def _jittered(self, interval):
+        return max(interval * (1 + random.uniform(-self.jitter, self.jitter)), 0)
+
+    async def run_once(self, name):
+        """Scrapes one source now and records the outcome in the status table."""
+        status = self._status[name]
+        async with self._semaphore:
+            started = time.perf_counter()
+            status["last_run"] = datetime.now().isoformat(timespec="seconds")
+            try:
+                articles = await asyncio.to_thread(scrape_source, REGISTRY[name])
+            except Exception as e:
+                print(f"[prefetch {name}] Failed: {e}")
+                status["last_error"] = str(e)
+            else:
+                status["last_items"] = len(articles)
+                status["last_error"] = None
+            status["last_duration"] = round(time.perf_counter() - started, 3)
+            status["runs"] += 1
+
+    async def _loop(self, name, interval):
+        # Spread the first runs out so all sources don't start at once.
+        delay = random.uniform(0, interval * self.jitter)
+        while True:
+            status = self._status[name]
+            status["next_run"] = datetime.fromtimestamp(time.time() + delay).isoformat(timespec="seconds")
+            await asyncio.sleep(delay)
+            await self.run_once(name)
+            delay = self._jittered(interval)
+
+    def start(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._tasks = [
+            asyncio.create_task(self._loop(name, interval), name=f"prefetch-{name}")
+            for name, interval in self.schedule.items()
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self):
+        return {
+            "running": any(not task.done() for task in self._tasks),
+            "concurrency": self.concurrency,
+            "jitter": self.jitter,
+            "sources": self._status,
+        }
+
+
+scheduler = PrefetchScheduler()
@@ -0,0 +1,303 @@
+"""
+Deterministic fast path for plain listing queries.
+
+By the prompt's "Default Action" rule, a query that only names dates and
+(optionally) outlets or sections, such as "articles for June 10" or "dawn
+editorials from last 3 days", is answered with the titles and URLs of the
+articles of that period. Such queries are recognized here and answered by
+calling the scrapers directly, without the two or more Gemini round trips of an
+agent run.
+
+route() only accepts a query when every word of it is understood: a date
+expression, an outlet or section keyword, or a filler word like "show" or
+"articles". Anything else ("summarize", a topic, a typo) returns None and the
+query goes to the agent as before.
+"""
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sources import REGISTRY
+
+
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "1") == "1"
+# Longer ranges go to the agent rather than triggering a large scrape.
+ROUTER_MAX_DAYS = int(os.getenv("ROUTER_MAX_DAYS", "31"))
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "fourteen": 14, "thirty": 30,
+}
+
+FILLER = frozenset("""
+a all an and any are article articles between can dated day days did for from get give i in
+is list me my need news newspaper of on paper pieces please pls published section sections show
+stories story the through till to until wants want were what which you since
+""".split())
+
+OUTLETS = {
+    "dawn": "dawn",
+    "express tribune": "tribune",
+    "tribune": "tribune",
+    "paradigm shift": "paradigmshift",
+    "paradigmshift": "paradigmshift",
+}
+SECTIONS = {
+    "editorials": "editorial",
+    "editorial": "editorial",
+    "opinions": "column",
+    "opinion": "column",
+    "op-eds": "column",
+    "op-ed": "column",
+    "columns": "column",
+    "column": "column",
+    "international relations": "international relations",
+}
+# What the prompt's "Default Action" lists for a query naming only dates.
+DEFAULT_ADAPTERS = ("dawn-editorial", "dawn-column")
+# Only a section when the outlet is named too; otherwise "pakistan" is a topic.
+OUTLET_SECTIONS = {"paradigmshift": {"pakistan": "pakistan"}}
+
+_MONTH = r"(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_YEAR = r"(?:,?\s*(\d{4}))?"
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_MONTH_DAY_SPAN = re.compile(rf"\b{_MONTH}\s+(\d{{1,2}})\s*(?:-|to|until|till|through)\s*(\d{{1,2}}){_YEAR}\b")
+_MONTH_DAY = re.compile(rf"\b{_MONTH}\s+(\d{{1,2}}){_YEAR}\b")
+_DAY_MONTH = re.compile(rf"\b(\d{{1,2}})(?:\s+of)?\s+{_MONTH}{_YEAR}\b")
+_SPAN_WORDS = re.compile(r"\b(?:to|until|till|through|between)\b|(?:^|\s)-(?:\s|$)")
+_LAST_N_DAYS = re.compile(r"\b(?:last|past|previous)\s+(\d{1,2}|" + "|".join(NUMBERS) + r")\s+days?\b")
+
+
+_stats = {"routed": 0, "fallback": 0}
+
+
+@dataclass(frozen=True)
+class Route:
+    adapters: tuple
+    start_date: str
+    end_date: str
+
+
+def _date(year, month, day):
+    try:
+        return datetime(year, month, day).date()
+    except ValueError:
+        return None
+
+
+def _infer_year(month, day, year, today):
+    # "June 10" means the most recent June 10 that is not in the future.
+    if year:
+        return _date(int(year), month, day)
+    found = _date(today.year, month, day)
+    if found and found > today:
+        found = _date(today.year - 1, month, day)
+    return found
+
+
+def parse_dates(text, today):
+    """
+    Finds the date expression of a (lowercased) query. Returns (start, end,
+    remaining text), with start and end None when the query names no dates,
+    or None when the dates are invalid or ambiguous.
+    """
+    ranges = []
+
+    def relative(pattern, days_back):
+        nonlocal text
+        if re.search(pattern, text):
+            text = re.sub(pattern, " ", text)
+            ranges.append((today - timedelta(days=days_back[0]), today - timedelta(days=days_back[1])))
+
+    relative(r"\bday before yesterday\b", (2, 2))
+    relative(r"\byesterday'?s?\b", (1, 1))
+    relative(r"\btoday'?s?\b", (0, 0))
+    relative(r"\b(?:last|past|this)\s+week'?s?\b", (6, 0))
+    for match in _LAST_N_DAYS.finditer(text):
+        count = NUMBERS.get(match.group(1)) or int(match.group(1))
+        if count < 1:
+            return None
+        ranges.append((today - timedelta(days=count - 1), today))
+    text = _LAST_N_DAYS.sub(" ", text)
+
+    explicit = []
+    matches = 0
+
+    def collect(pattern, build):
+        nonlocal text, matches
+        for match in pattern.finditer(text):
+            dates = build(match)
+            if dates is None or None in dates:
+                return False
+            explicit.extend(dates)
+            matches += 1
+        text = pattern.sub(" ", text)
+        return True
+
+    ok = (
+        collect(_ISO_DATE, lambda m: [_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))])
+        and collect(_MONTH_DAY_SPAN, lambda m: [
+            _infer_year(MONTHS[m.group(1)], int(m.group(2)), m.group(4), today),
+            _infer_year(MONTHS[m.group(1)], int(m.group(3)), m.group(4), today),
+        ])
+        and collect(_MONTH_DAY, lambda m: [_infer_year(MONTHS[m.group(1)], int(m.group(2)), m.group(3), today)])
+        and collect(_DAY_MONTH, lambda m: [_infer_year(MONTHS[m.group(2)], int(m.group(1)), m.group(3), today)])
+    )
+    if not ok:
+        return None
+    if explicit:
+        if len(explicit) > 2:
+            return None
+        # Two separate dates are a range only when the query says so: "june 10
+        # and june 12" names two days, not the three from one to the other.
+        if matches == 2 and not _SPAN_WORDS.search(text):
+            return None
+        # "since June 5" runs to today.
+        if len(explicit) == 1 and re.search(r"\bsince\b", text):
+            explicit.append(today)
+        ranges.append((min(explicit), max(explicit)))
+    if len(ranges) > 1:
+        return None
+    if not ranges:
+        return None, None, text
+    start, end = ranges[0]
+    return start, end, text
+
+
+def parse_sources(text):
+    """
+    Finds outlet and section keywords. Returns (outlets, sections, remaining
+    text).
+    """
+    outlets, sections = set(), set()
+    for keywords, found in ((OUTLETS, outlets), (SECTIONS, sections)):
+        for keyword in sorted(keywords, key=len, reverse=True):
+            pattern = rf"\b{re.escape(keyword)}(?:'s)?\b"
+            if re.search(pattern, text):
+                found.add(keywords[keyword])
+                text = re.sub(pattern, " ", text)
+    for outlet in outlets:
+        for keyword, section in OUTLET_SECTIONS.get(outlet, {}).items():
+            pattern = rf"\b{re.escape(keyword)}\b"
+            if re.search(pattern, text):
+                sections.add(section)
+                text = re.sub(pattern, " ", text)
+    return outlets, sections, text
+
+
+def _select_adapters(outlets, sections, past_only):
+    if not (outlets or sections):
+        # A query naming only dates gets the prompt's default sections,
+        # whatever the dates.
+        return [REGISTRY[name] for name in DEFAULT_ADAPTERS]
+    selected = []
+    for adapter in REGISTRY.values():
+        if outlets and adapter.source not in outlets:
+            continue
+        if sections and adapter.section.lower() not in sections:
+            continue
+        selected.append(adapter)
+    if past_only:
+        named_undated = [a for a in selected if not a.dated and a.source in outlets]
+        if named_undated:
+            # Tribune and ParadigmShift only have their latest articles; a
+            # request for their past articles needs the agent.
+            return []
+        selected = [a for a in selected if a.dated]
+    return selected
+
+
+def route(query, today_str):
+    """
+    Returns a Route for a plain listing query, or None if the query needs the
+    agent.
+    """
+    matched = _route(query, today_str)
+    _stats["routed" if matched else "fallback"] += 1
+    return matched
+
+
+def _parse(query, today):
+    """(start, end, outlets, sections, remaining text) of a query, or None."""
+    text = re.sub(r"(\d{1,2})(?:st|nd|rd|th)\b", r"\1", query.lower())
+    parsed = parse_dates(text, today)
+    if parsed is None:
+        return None
+    start, end, text = parsed
+    outlets, sections, text = parse_sources(text)
+    return start, end, outlets, sections, text
+
+
+def _route(query, today_str):
+    today = datetime.strptime(today_str, "%Y-%m-%d").date()
+    parsed = _parse(query, today)
+    if parsed is None:
+        return None
+    start, end, outlets, sections, text = parsed
+    words = re.findall(r"[a-z0-9']+", text)
+    if any(word not in FILLER for word in words):
+        return None
+    if start is None and not (outlets or sections):
+        # Nothing but filler: not a request we can be sure about.
+        return None
+    start, end = start or today, end or today
+    if end > today or (end - start).days + 1 > ROUTER_MAX_DAYS:
+        return None
+    adapters = _select_adapters(outlets, sections, past_only=end < today)
+    if not adapters:
+        return None
+    return Route(tuple(adapters), start.isoformat(), end.isoformat())
+
+
+def scrape_plan(query, today_str):
+    """
+    Returns a Route for the scrapes a query most likely needs, whether or not
+    route() can answer it: other words are ignored, so "summarize dawn
+    editorials on june 10 about the budget" gives Dawn's editorials of June 10.
+    Dates and sources are resolved as in route(): no dates means today, and no
+    outlet or section means DEFAULT_ADAPTERS. Returns None when the query names
+    neither, or names dates that are invalid, in the future or longer than
+    ROUTER_MAX_DAYS.
+    """
+    today = datetime.strptime(today_str, "%Y-%m-%d").date()
+    parsed = _parse(query, today)
+    if parsed is None:
+        return None
+    start, end, outlets, sections, _ = parsed
+    if start is None and not (outlets or sections):
+        return None
+    start, end = start or today, end or today
+    if end > today or (end - start).days + 1 > ROUTER_MAX_DAYS:
+        return None
+    adapters = _select_adapters(outlets, sections, past_only=end < today)
+    if not adapters:
+        return None
+    return Route(tuple(adapters), start.isoformat(), end.isoformat())
+
+
+def stats():
+    total = _stats["routed"] + _stats["fallback"]
+    return {**_stats, "routed_rate": round(_stats["routed"] / total, 3) if total else 0.0}
+
+
+def format_listing(articles, start_date, end_date):
+    """Markdown list of article titles with their URLs, grouped by source and section."""
+    period = start_date if start_date == end_date else f"{start_date} to {end_date}"
+    if not articles:
+        return f"No articles were found for {period}."
+    lines = [f"Here are the articles for {period}:"]
+    group = None
+    for article in articles:
+        if (article["source"], article["section"]) != group:
+            group = (article["source"], article["section"])
+            lines.append(f"\n**{article['source'].title()} ({article['section'].title()})**")
+        title = article.get("title") or article["url"]
+        lines.append(f"- [{title}]({article['url']})" + (f" ({article['date']})" if article.get("date") else ""))
+    return "\n".join(lines)
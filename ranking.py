@@ -0,0 +1,163 @@
+"""
+Local relevance ranking of scraped articles for topic queries.
+
+Instead of handing Gemini every article of a date range and asking it to pick
+the ones about "economy", the scraping tools rank their output with BM25 over
+title and content and pass on only the top matches, each with its score.
+Query words are expanded through a small synonym table so "economy" also finds
+articles about inflation, the IMF or the budget.
+
+Scoring is vectorized with NumPy: the index keeps, for every term, the array of
+documents containing it and the precomputed BM25 term weights, so a query costs
+one scatter-add per query term regardless of the number of articles.
+"""
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+
+RANK_TOP_K = int(os.getenv("RANK_TOP_K", "8"))
+# Title words count this many times more than content words.
+RANK_TITLE_WEIGHT = int(os.getenv("RANK_TITLE_WEIGHT", "3"))
+# Weight of a synonym relative to a word from the query itself.
+RANK_SYNONYM_WEIGHT = float(os.getenv("RANK_SYNONYM_WEIGHT", "0.5"))
+# Articles whose term counts are kept between queries.
+RANK_CACHE_SIZE = int(os.getenv("RANK_CACHE_SIZE", "20000"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have in is it its of on or that the their
+this to was were will with about after all also articles any article news give show me
+find list summarize summary key points related topic latest
+""".split())
+
+SYNONYMS = {
+    "economy": ["economic", "inflation", "imf", "budget", "gdp", "fiscal", "growth", "debt", "tax", "rupee"],
+    "climate": ["environment", "flood", "floods", "heatwave", "emissions", "warming", "drought", "monsoon"],
+    "politics": ["political", "election", "elections", "parliament", "assembly", "senate", "government", "opposition"],
+    "education": ["school", "schools", "university", "universities", "students", "literacy", "teachers"],
+    "health": ["hospital", "hospitals", "disease", "polio", "vaccine", "medical", "healthcare"],
+    "security": ["terrorism", "militancy", "militants", "military", "attack", "police", "defence"],
+    "energy": ["power", "electricity", "gas", "oil", "fuel", "circular", "tariff", "solar"],
+    "foreign": ["diplomacy", "diplomatic", "relations", "bilateral", "india", "china", "afghanistan", "us"],
+    "water": ["dam", "dams", "indus", "irrigation", "shortage"],
+    "judiciary": ["court", "courts", "judge", "judges", "justice", "supreme", "constitutional"],
+    "trade": ["exports", "imports", "tariffs", "deficit"],
+}
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [word for word in _WORD.findall((text or "").lower()) if word not in STOPWORDS]
+
+
+def expand_query(query, synonyms=SYNONYMS, synonym_weight=RANK_SYNONYM_WEIGHT):
+    """
+    Returns {term: weight} for a query: its own words at weight 1, plus the
+    synonyms of each word at `synonym_weight`.
+    """
+    weights = {}
+    for word in tokenize(query):
+        weights[word] = 1.0
+        # "economic" should expand like "economy".
+        key = word if word in synonyms else next((k for k, v in synonyms.items() if word in v), None)
+        for synonym in synonyms.get(key, []) + ([key] if key and key != word else []):
+            weights.setdefault(synonym, synonym_weight)
+    return weights
+
+
+_term_counts = OrderedDict()
+_term_counts_lock = threading.Lock()
+
+
+def term_counts(article, title_weight=RANK_TITLE_WEIGHT):
+    """
+    Returns {term: count} for an article's title and content. Tokenizing is
+    most of the cost of ranking, and the same articles come back query after
+    query, so counts are cached by URL and text.
+    """
+    title = article.get("title") or ""
+    body = article.get("content") or article.get("summary") or article.get("snippet") or ""
+    key = (article.get("url"), title, hash(body), title_weight)
+    with _term_counts_lock:
+        counts = _term_counts.get(key)
+        if counts is not None:
+            _term_counts.move_to_end(key)
+            return counts
+    counts = Counter(tokenize(body))
+    for word in tokenize(title):
+        counts[word] += title_weight
+    with _term_counts_lock:
+        _term_counts[key] = counts
+        while len(_term_counts) > RANK_CACHE_SIZE:
+            _term_counts.popitem(last=False)
+    return counts
+
+
+class BM25Index:
+    def __init__(self, articles, title_weight=RANK_TITLE_WEIGHT, k1=BM25_K1, b=BM25_B):
+        self.articles = list(articles)
+        self._vocabulary = {}
+        term_ids, tf, lengths = [], [], []
+        for article in self.articles:
+            counts = term_counts(article, title_weight)
+            term_ids.extend(self._vocabulary.setdefault(term, len(self._vocabulary)) for term in counts)
+            tf.extend(counts.values())
+            lengths.append(len(counts))
+
+        n_docs = len(self.articles)
+        doc_ids = np.repeat(np.arange(n_docs), lengths)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        tf = np.asarray(tf, dtype=np.float64)
+        lengths = np.bincount(doc_ids, weights=tf, minlength=n_docs)
+        avg_length = lengths.mean() if n_docs and lengths.any() else 1.0
+
+        # Postings: one entry per (term, document) pair, grouped by term.
+        order = np.argsort(term_ids, kind="stable")
+        self._postings_docs = doc_ids[order]
+        tf = tf[order]
+        self._offsets = np.searchsorted(term_ids[order], np.arange(len(self._vocabulary) + 1))
+
+        df = np.diff(self._offsets).astype(np.float64)
+        self._idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths[self._postings_docs] / avg_length)
+        self._weights = tf * (k1 + 1) / (tf + norm)
+
+    def scores(self, term_weights):
+        """Returns the BM25 score of every article for {term: weight}."""
+        scores = np.zeros(len(self.articles))
+        for term, weight in term_weights.items():
+            term_id = self._vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            np.add.at(scores, self._postings_docs[start:end], weight * self._idf[term_id] * self._weights[start:end])
+        return scores
+
+    def top(self, query, top_k=RANK_TOP_K):
+        """
+        Returns up to `top_k` (article, score) pairs matching the query, best
+        first. Articles sharing no term with the expanded query are left out.
+        """
+        scores = self.scores(expand_query(query))
+        matching = np.flatnonzero(scores > 0)
+        if len(matching) > top_k:
+            matching = matching[np.argpartition(-scores[matching], top_k - 1)[:top_k]]
+        order = matching[np.argsort(-scores[matching], kind="stable")]
+        return [(self.articles[i], float(scores[i])) for i in order]
+
+
+def rank_articles(articles, topic=None, top_k=RANK_TOP_K):
+    """
+    Returns the `top_k` articles most relevant to `topic`, best first, each
+    with a 'score'. Without a topic the articles are returned unchanged.
+    """
+    if not topic or not articles:
+        return articles
+    return [{**article, "score": round(score, 3)} for article, score in BM25Index(articles).top(topic, top_k)]
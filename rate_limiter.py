@@ -0,0 +1,173 @@
+"""
+Per-host rate limiting of outbound fetches, shared by every worker process.
+
+Each host has a token bucket (RATE_LIMIT_RATE requests per second, bursts of up
+to RATE_LIMIT_BURST) kept in a SQLite file, so all uvicorn/gunicorn workers on
+the machine draw from the same bucket. A fetch takes a token before it is
+sent; when the bucket is empty the token is borrowed and the fetch sleeps
+until it is paid back, so concurrent fetches queue up evenly instead of
+bursting into 429s.
+
+A 429 response, or any response with Retry-After, empties the host's bucket
+until the server's deadline: every worker holds off the host, not only the one
+that got the response. A fetch that would have to wait longer than
+RATE_LIMIT_MAX_WAIT fails with RateLimitExceeded instead of hanging its request.
+
+Configuration:
+    RATE_LIMIT_ENABLED  "0" disables rate limiting (default "1")
+    RATE_LIMIT_PATH     bucket database (CACHE_DIR/ratelimit.sqlite3)
+    RATE_LIMIT_RATE     default requests per second per host (8)
+    RATE_LIMIT_BURST    default bucket size (16)
+    RATE_LIMIT_HOSTS    per-host overrides, e.g. "tribune.com.pk=2:4,www.dawn.com=6" (rate[:burst])
+    RATE_LIMIT_MAX_WAIT longest a fetch waits for its token, in seconds (30)
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+import telemetry
+
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", os.path.join(os.getenv("CACHE_DIR", "cache"), "ratelimit.sqlite3"))
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "8"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "16"))
+RATE_LIMIT_HOSTS = os.getenv("RATE_LIMIT_HOSTS", "")
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30"))
+
+
+class RateLimitExceeded(requests.RequestException):
+    """The host is rate limited for longer than the caller is willing to wait."""
+
+
+def parse_limits(spec, rate=RATE_LIMIT_RATE, burst=RATE_LIMIT_BURST):
+    """
+    Returns {host: (rate, burst)} from a comma-separated "host=rate[:burst]"
+    spec. A host without a burst gets twice its rate, at least 1.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, value = item.partition("=")
+        host_rate, _, host_burst = value.partition(":")
+        if not host or not host_rate:
+            raise ValueError(f"Invalid RATE_LIMIT_HOSTS entry '{item}', expected host=rate[:burst]")
+        host_rate = float(host_rate)
+        limits[host.lower()] = (host_rate, float(host_burst) if host_burst else max(host_rate * 2, 1))
+    return limits
+
+
+class RateLimiter:
+    def __init__(self, path=RATE_LIMIT_PATH, rate=RATE_LIMIT_RATE, burst=RATE_LIMIT_BURST, limits=None):
+        self.rate = rate
+        self.burst = burst
+        self.limits = parse_limits(RATE_LIMIT_HOSTS, rate, burst) if limits is None else limits
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Transactions are opened explicitly with BEGIN IMMEDIATE, so that a
+        # bucket is read and updated by one process at a time.
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "blocks": 0, "rejected": 0}
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Losing the last bucket updates in a crash is harmless; an fsync per request is not.
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    host TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+
+    def limit(self, host):
+        """(rate, burst) of a host."""
+        return self.limits.get(host.lower(), (self.rate, self.burst))
+
+    def _update(self, host, change):
+        """
+        Runs change(tokens, now, rate, burst) -> (tokens, updated) on the host's
+        refilled bucket in one transaction. Returns the new tokens and the rate.
+        """
+        rate, burst = self.limit(host)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE host = ?", (host,)).fetchone()
+                tokens, updated = row if row else (burst, now)
+                # `updated` is in the future while the host is blocked, which
+                # leaves the bucket in debt until then.
+                tokens = min(burst, tokens + (now - updated) * rate)
+                tokens, updated = change(tokens, now, rate, burst)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (host, tokens, updated) VALUES (?, ?, ?)", (host, tokens, updated)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return tokens, rate
+
+    def acquire(self, host, max_wait=RATE_LIMIT_MAX_WAIT):
+        """
+        Takes a token for one request to `host`, sleeping until it is
+        available, and returns the time waited. Raises RateLimitExceeded
+        (and gives the token back) if that would take longer than `max_wait`.
+        """
+        tokens, rate = self._update(host, lambda tokens, now, rate, burst: (tokens - 1, now))
+        wait = max(-tokens / rate, 0.0) if rate > 0 else 0.0
+        if max_wait is not None and wait > max_wait:
+            self._update(host, lambda tokens, now, rate, burst: (tokens + 1, now))
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise RateLimitExceeded(f"{host} is rate limited for another {wait:.0f} s")
+        started = time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        telemetry.RATE_LIMIT_WAIT_SECONDS.labels(host=host).observe(wait)
+        if wait > 0:
+            telemetry.record("rate_limit", started, wait, host=host)
+        with self._lock:
+            self._stats["acquired"] += 1
+            if wait > 0:
+                self._stats["waited"] += 1
+                self._stats["wait_seconds"] += wait
+        return wait
+
+    def block(self, host, seconds):
+        """Stops every worker from sending requests to `host` for `seconds` (e.g. Retry-After)."""
+        self._update(host, lambda tokens, now, rate, burst: (min(tokens, 0.0), now + max(seconds, 0)))
+        with self._lock:
+            self._stats["blocks"] += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["wait_seconds"] = round(snapshot["wait_seconds"], 3)
+        snapshot["rate"] = self.rate
+        snapshot["burst"] = self.burst
+        return snapshot
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Returns the process-wide RateLimiter, opening its database on first use."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def stats():
+    if not RATE_LIMIT_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **get_limiter().stats()}
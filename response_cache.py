@@ -0,0 +1,129 @@
+"""
+Query-level response cache with single-flight de-duplication for /invoke.
+
+Responses are keyed by the normalized query text plus the current date the
+agent was given, so "today's editorials" asked tomorrow is a different entry.
+While a query is being answered, identical requests wait for that run instead
+of starting their own.
+"""
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+# Answers that involve today's (still changing) pages expire quickly, answers
+# about past dates can be kept for much longer.
+RESPONSE_TTL_TODAY = int(os.getenv("RESPONSE_TTL_TODAY", "300"))
+RESPONSE_TTL_PAST = int(os.getenv("RESPONSE_TTL_PAST", str(24 * 60 * 60)))
+
+
+def normalize_query(query):
+    query = re.sub(r"\s+", " ", query.lower()).strip()
+    return query.rstrip(".?! ")
+
+
+def make_key(query, today, payload="titles"):
+    return f"{today}|{payload}|{normalize_query(query)}"
+
+
+class ResponseCache:
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "saved_seconds": 0.0}
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, duration = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value, duration
+
+    def _store(self, key, value, ttl, duration):
+        self._entries[key] = (value, time.time() + ttl, duration)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None."""
+        cached = self._lookup(key)
+        if cached is None:
+            return None
+        value, duration = cached
+        self._stats["hits"] += 1
+        self._stats["saved_seconds"] += duration
+        return value
+
+    def contains(self, key):
+        """Whether `key` is cached or being computed, without counting a lookup."""
+        return key in self._in_flight or self._lookup(key) is not None
+
+    def put(self, key, value, ttl, duration):
+        """Caches a value computed outside get_or_compute(), e.g. by a streamed run."""
+        self._stats["misses"] += 1
+        if ttl > 0:
+            self._store(key, value, ttl, duration)
+
+    async def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for `key`, or awaits compute() once for all
+        concurrent callers. compute() must return (value, ttl_seconds); a ttl of
+        0 or less means the value is not cached. Exceptions are passed to every
+        waiter and nothing is cached.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self._stats["coalesced"] += 1
+            started = time.perf_counter()
+            value, duration = await asyncio.shield(in_flight)
+            self._stats["saved_seconds"] += max(duration - (time.perf_counter() - started), 0.0)
+            return value
+
+        self._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        started = time.perf_counter()
+        try:
+            value, ttl = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            duration = time.perf_counter() - started
+            if ttl > 0:
+                self._store(key, value, ttl, duration)
+            future.set_result((value, duration))
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def stats(self):
+        lookups = self._stats["hits"] + self._stats["coalesced"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "saved_seconds": round(self._stats["saved_seconds"], 3),
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "hit_rate": round((self._stats["hits"] + self._stats["coalesced"]) / lookups, 3) if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,117 @@
+"""
+Single-flight coordination of scrapes across concurrent requests.
+
+Date ranges are split into per-(source section, date) units: one listing page
+plus the top articles linked from it. If a unit (or a single article) is already being
+fetched for another request, later callers get the same in-flight Future
+instead of starting a second fetch. Finished units are dropped right away;
+repeat reads are served by the page cache, not by this module.
+"""
+import threading
+from concurrent.futures import Future
+
+from fetch_engine import get_engine
+
+
+class ScrapeCoordinator:
+    def __init__(self, fetch_listing, fetch_article, is_immutable):
+        """
+        fetch_listing(page_url, adapter, immutable, date) -> article links, or cards in card mode
+        fetch_article(url, adapter, immutable, date) -> article dict
+        is_immutable(date) -> whether pages for that date never change
+        """
+        self._fetch_listing = fetch_listing
+        self._fetch_article = fetch_article
+        self._is_immutable = is_immutable
+        self._in_flight = {}
+        # Re-entrant: starting a day unit registers its listing and article
+        # flights, and callbacks may run inline when a future is already done.
+        self._lock = threading.RLock()
+        self._stats = {"started": 0, "joined": 0}
+
+    def _flight(self, key, start):
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats["joined"] += 1
+                return future
+            future = start()
+            self._in_flight[key] = future
+            self._stats["started"] += 1
+        future.add_done_callback(lambda f: self._land(key, f))
+        return future
+
+    def _land(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def _immutable(self, date):
+        return date is not None and self._is_immutable(date)
+
+    def article(self, adapter, url, date=None):
+        """Returns a Future for the article at `url`, shared with any fetch already running."""
+        return self._flight(
+            ("article", url),
+            lambda: get_engine().submit(url, self._fetch_article, adapter, self._immutable(date), date),
+        )
+
+    def listing(self, adapter, date=None):
+        """
+        Returns a Future for the entries of an adapter's listing page for `date`
+        (article links, or article cards in card mode). Undated sources have a
+        single listing page and take date=None.
+        """
+        page_url = adapter.page_url(date)
+        return self._flight(
+            ("listing", adapter.name, date),
+            lambda: get_engine().submit(page_url, self._fetch_listing, adapter, self._immutable(date), date),
+        )
+
+    def day(self, adapter, date=None):
+        """
+        Returns a Future for one (source section, date) unit: a dict with the
+        date, every entry on the listing page ('entries') and the fetched top
+        articles of the day keyed by URL ('articles'). Card-mode sources need no
+        article fetches, so their 'articles' is empty.
+        """
+        return self._flight(("day", adapter.name, date), lambda: self._start_day(adapter, date))
+
+    def _start_day(self, adapter, date):
+        unit = Future()
+        unit.set_running_or_notify_cancel()
+
+        def on_listing(listing):
+            if listing.exception() is not None:
+                unit.set_exception(listing.exception())
+                return
+            entries = listing.result()
+            top = [] if adapter.card_mode else [
+                (href, self.article(adapter, href, date)) for href in entries[:adapter.limit]
+            ]
+            remaining = [len(top)]
+            lock = threading.Lock()
+
+            def on_article(_):
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0]:
+                        return
+                try:
+                    articles = {href: future.result() for href, future in top}
+                except Exception as e:
+                    unit.set_exception(e)
+                else:
+                    unit.set_result({"date": date, "entries": entries, "articles": articles})
+
+            if not top:
+                unit.set_result({"date": date, "entries": entries, "articles": {}})
+            for _, future in top:
+                future.add_done_callback(on_article)
+
+        self.listing(adapter, date).add_done_callback(on_listing)
+        return unit
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._in_flight)}
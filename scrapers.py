@@ -0,0 +1,269 @@
+"""
+Scraping pipeline behind the agent tools in main.py.
+
+Any outlet registered in sources.py is scraped the same way: listing pages for
+the dates in a range are fetched in parallel, and each article fetch is queued
+as soon as its listing page has been parsed, instead of walking the range one
+request at a time. Pages for dates before today are read through the page
+cache as immutable, so a past range is only ever downloaded once. Listings
+that still change (today's) only cost the articles that newly appeared on
+them, see listing_tracker.py.
+
+Ranges are processed as a pipeline: at most SCRAPE_WINDOW_DAYS days of a source
+are in flight at once, the next day starting as soon as the oldest one has been
+handed over, and days are yielded one at a time. Memory therefore depends on
+the window, not on the length of the range, for callers that consume the days
+as they come (see backfill.py).
+"""
+import contextvars
+import os
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import islice
+
+import requests
+
+import article_cache
+import article_store
+import extract
+import listing_tracker
+import page_cache
+import telemetry
+from scrape_coordinator import ScrapeCoordinator
+
+
+# Optional callback(adapter, article) told about every article as soon as it is
+# assembled, e.g. to stream progress to a client. Context variables follow the
+# agent into its tool threads, so it only sees articles of its own request.
+article_listener = contextvars.ContextVar("article_listener", default=None)
+
+SCRAPE_WINDOW_DAYS = int(os.getenv("SCRAPE_WINDOW_DAYS", "8"))
+
+
+def iter_dates(start_date, end_date):
+    """Yields every "YYYY-MM-DD" date from start_date to end_date inclusive."""
+    current = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    while current <= end:
+        yield current.strftime("%Y-%m-%d")
+        current += timedelta(days=1)
+
+
+def date_range(start_date, end_date):
+    """Returns every "YYYY-MM-DD" date from start_date to end_date inclusive."""
+    return list(iter_dates(start_date, end_date))
+
+
+def is_past_date(date_str):
+    return date_str < datetime.today().strftime("%Y-%m-%d")
+
+
+def fetch_listing(page_url, adapter, immutable=False, date=None):
+    """
+    Fetches a listing page and returns its entries: article links in page order
+    without duplicates, or article cards for card-mode sources. When a listing
+    that may still change was downloaded again (not served from the page cache
+    or revalidated as unchanged), its URLs are recorded with the listing tracker.
+    """
+    response = page_cache.get(page_url, immutable=immutable)
+    response.raise_for_status()
+    html = response.content if adapter.parse_bytes else response.text
+    if adapter.card_mode:
+        with telemetry.span("parse", telemetry.PARSE_SECONDS, source=adapter.source, kind="cards"):
+            entries = extract.parse_cards(html, adapter)
+        urls = [card["url"] for card in entries if card.get("url")]
+    else:
+        with telemetry.span("parse", telemetry.PARSE_SECONDS, source=adapter.source, kind="listing"):
+            entries = extract.parse_links(html, adapter)
+        urls = entries
+    if not immutable and listing_tracker.INCREMENTAL_ENABLED and not response.from_cache:
+        new = listing_tracker.get_tracker().observe(adapter.name, listing_date(date), urls)
+        if new:
+            telemetry.logger.debug("[%s %s] %d new of %d listed articles", adapter.name, listing_date(date),
+                                   len(new), len(urls))
+    return entries
+
+
+def listing_date(date):
+    """The date a listing is tracked under: undated listings per day they are seen on."""
+    return date or datetime.today().strftime("%Y-%m-%d")
+
+
+def parse_article(response, url, adapter):
+    with telemetry.span("parse", telemetry.PARSE_SECONDS, source=adapter.source, kind="article"):
+        parsed = extract.parse_article(response.content if adapter.parse_bytes else response.text, adapter)
+    return {"title": parsed["title"], "content": parsed["content"], "url": url, "date": parsed["date"]}
+
+
+def fetch_article(url, adapter, immutable=False, date=None):
+    """
+    Returns an article dict, from the article cache when possible. An article
+    of a listing that may still change (the one for `date`) is only downloaded
+    the first time it appears on it, or when it is due to be re-checked for
+    edits (see listing_tracker.py).
+    """
+    tracker = listing_tracker.get_tracker() if not immutable and listing_tracker.INCREMENTAL_ENABLED else None
+    listing = (adapter.name, listing_date(date))
+    state = tracker.check(*listing, url) if tracker is not None else listing_tracker.UNKNOWN
+    if state != listing_tracker.DUE:
+        cached = article_cache.get(url)
+        if cached is not None:
+            if state == listing_tracker.UNKNOWN and tracker is not None and cached["title"]:
+                tracker.record(*listing, cached)
+            return cached
+    if state == listing_tracker.KNOWN:
+        # Already fetched from this listing: parse the copy on disk.
+        response = page_cache.peek(url)
+        if response is not None:
+            article = parse_article(response, url, adapter)
+            if article["title"]:
+                tracker.reused()
+                article_cache.put(article, ttl=page_cache.ARTICLE_TTL)
+                return article
+    try:
+        response = page_cache.get(url, immutable=immutable, ttl=page_cache.ARTICLE_TTL,
+                                  revalidate=state == listing_tracker.DUE)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Failed to fetch the URL: {e}")
+        return {"title": "", "content": "", "url": url, "date": None}
+
+    article = parse_article(response, url, adapter)
+    if article["title"]:
+        if tracker is not None and tracker.record(*listing, article):
+            telemetry.logger.debug("[%s] Article was edited: %s", adapter.name, url)
+        # Pages for today may still be edited, like in the page cache.
+        article_cache.put(article, ttl=None if immutable else page_cache.ARTICLE_TTL)
+    return article
+
+
+def start_source(adapter, start_date=None, end_date=None, window=SCRAPE_WINDOW_DAYS):
+    """
+    Starts scraping one source and returns an iterator of its (date, unit
+    future) pairs in date order. Dated sources get one unit per day of the
+    range (defaulting to today); undated sources get a single unit for their
+    current listing page.
+
+    The first `window` days are started right away, before this returns, and
+    each further day is started as an earlier one is taken from the iterator.
+    """
+    if not adapter.dated:
+        return iter([(None, coordinator.day(adapter))])
+    today = datetime.today().strftime("%Y-%m-%d")
+    dates = iter_dates(start_date or today, end_date or today)
+    started = deque((date_str, coordinator.day(adapter, date_str)) for date_str in islice(dates, max(window, 1)))
+
+    def units():
+        while started:
+            date_str, unit = started.popleft()
+            next_date = next(dates, None)
+            if next_date is not None:
+                started.append((next_date, coordinator.day(adapter, next_date)))
+            yield date_str, unit
+
+    return units()
+
+
+def iter_days(adapter, units):
+    """
+    Waits for the units returned by start_source() one at a time and yields
+    (date, articles) for each, or (date, None) if the day failed.
+
+    Days are assembled in date order with the same cross-day de-duplication as
+    a serial walk (a link already taken on an earlier day is skipped and the
+    next one is used instead), so the output does not depend on which request
+    finishes first. For dated sources each article's 'date' is its listing
+    date. Every day's articles are also written to the local article store.
+    """
+    seen = set()
+    listener = article_listener.get()
+    for date_str, unit in units:
+        try:
+            day = unit.result()
+        except Exception as e:
+            print(f"[{adapter.name} {date_str or 'latest'}] Failed to fetch: {e}")
+            yield date_str, None
+            continue
+        articles = []
+        if adapter.card_mode:
+            for card in day["entries"]:
+                articles.append(dict(card))
+                if listener:
+                    listener(adapter, card)
+        else:
+            for href in day["entries"]:
+                if href not in seen:
+                    seen.add(href)
+                    if href in day["articles"]:
+                        article = day["articles"][href]
+                    else:
+                        article = coordinator.article(adapter, href, date_str).result()
+                    article = dict(article)
+                    if adapter.dated:
+                        article["date"] = date_str
+                    articles.append(article)
+                    if listener:
+                        listener(adapter, article)
+                if len(articles) == adapter.limit:
+                    break
+        # Let the day's pages go before the caller works on its articles.
+        del day, unit
+        save_to_store(articles, source=adapter.source, section=adapter.section)
+        yield date_str, articles
+
+
+def collect_source(adapter, units):
+    """Returns the articles of every day of iter_days() as one list."""
+    return [article for _, articles in iter_days(adapter, units) for article in articles or ()]
+
+
+def scrape_source(adapter, start_date=None, end_date=None):
+    """Scrapes one registered source for a date range; see iter_days()."""
+    return collect_source(adapter, start_source(adapter, start_date, end_date))
+
+
+def scrape_sources(adapters, start_date=None, end_date=None):
+    """
+    Scrapes several sources concurrently and returns one merged list, each
+    article tagged with its 'source' and 'section'. Every source is started
+    before any is waited on, so all of them are fetched in parallel.
+    """
+    started = [(adapter, start_source(adapter, start_date, end_date)) for adapter in adapters]
+    merged = []
+    for adapter, units in started:
+        for article in collect_source(adapter, units):
+            merged.append({"source": adapter.source, "section": adapter.section, **article})
+    return merged
+
+
+def scrape_units(units):
+    """
+    Scrapes a set of (adapter, date) units once each, e.g. the union of what
+    several requests need, and returns the number of articles assembled. The
+    date is None for undated sources. Every unit is started before any is
+    waited on; the results stay warm in the page and article caches, so the
+    requests' own scrapes of the same units no longer go to the network.
+    """
+    dates = {}
+    for adapter, date_str in units:
+        dates.setdefault(adapter.name, (adapter, set()))[1].add(date_str)
+    started = [
+        (adapter, [(date_str, coordinator.day(adapter, date_str)) for date_str in sorted(days, key=lambda d: d or "")])
+        for adapter, days in dates.values()
+    ]
+    return sum(len(collect_source(adapter, iter(days))) for adapter, days in started)
+
+
+def save_to_store(articles, source=None, section=None):
+    """Writes scraped articles to the local article store, never failing the scrape."""
+    try:
+        article_store.get_store().save(articles, source=source, section=section)
+    except Exception as e:
+        print(f"Failed to save articles to the store: {e}")
+
+
+coordinator = ScrapeCoordinator(
+    fetch_listing=fetch_listing,
+    fetch_article=fetch_article,
+    is_immutable=is_past_date,
+)
@@ -0,0 +1,153 @@
+"""
+Registry of the news outlets the agent can scrape.
+
+Each outlet section is described declaratively by a SourceAdapter: where its
+listing page lives, how to find article links (or article cards) on it, how
+many to take, and which selectors hold the title, date and content of an
+article. The generic scraping pipeline in scrapers.py runs any adapter, so a
+new outlet is a new entry here rather than another scraper function.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from bs4 import SoupStrainer
+
+from extract import has_class
+
+
+@dataclass(frozen=True)
+class SourceAdapter:
+    # Registry key, e.g. "dawn-editorial".
+    name: str
+    source: str
+    section: str
+    # Listing page URL. A "{date}" placeholder makes the source dated: one
+    # listing page per day, with pages for past days treated as immutable.
+    listing_url: str
+    # Number of articles taken from each listing page.
+    limit: int
+
+    # Link mode: the listing page links to article pages.
+    link_selector: Optional[str] = None
+    link_prefix: str = ""
+    title_selector: Optional[str] = None
+    missing_title: Optional[str] = None
+    date_selector: Optional[str] = None
+    content_selector: Optional[str] = None
+    content_separator: str = "\n"
+    # Tags removed from each content element before reading its text.
+    content_drop_tags: tuple = ()
+    skip_empty_paragraphs: bool = False
+
+    # Card mode: every article is fully described by a card on the listing page.
+    card_selector: Optional[str] = None
+    card_link_selector: Optional[str] = None
+    card_date_selector: Optional[str] = None
+    card_summary_selector: Optional[str] = None
+
+    # Partial parsing: only subtrees matching these strainers are built.
+    listing_strainer: Optional[SoupStrainer] = None
+    article_strainer: Optional[SoupStrainer] = None
+    # Feed raw bytes to the parser so it detects the charset from the page
+    # itself, instead of decoding with the HTTP header's charset.
+    parse_bytes: bool = False
+
+    @property
+    def dated(self):
+        return "{date}" in self.listing_url
+
+    @property
+    def card_mode(self):
+        return self.card_selector is not None
+
+    def page_url(self, date=None):
+        return self.listing_url.format(date=date) if self.dated else self.listing_url
+
+
+REGISTRY = {}
+
+
+def register(adapter):
+    REGISTRY[adapter.name] = adapter
+    return adapter
+
+
+def get_adapter(name):
+    return REGISTRY[name]
+
+
+def adapters_for(names=None):
+    """
+    Returns the adapters for the given names, or all of them. A bare source
+    name such as "dawn" selects every section of that source.
+    """
+    if not names:
+        return list(REGISTRY.values())
+    selected = []
+    for name in names:
+        name = name.lower()
+        matches = [a for a in REGISTRY.values() if name in (a.name, a.source)]
+        if not matches:
+            raise ValueError(f"Unknown source '{name}'. Known sources: {', '.join(REGISTRY)}")
+        selected.extend(a for a in matches if a not in selected)
+    return selected
+
+
+def _dawn_section(section, limit):
+    return SourceAdapter(
+        name=f"dawn-{section}",
+        source="dawn",
+        section=section,
+        listing_url=f"https://www.dawn.com/newspaper/{section}/{{date}}",
+        limit=limit,
+        link_selector="article.story a.story__link[href]",
+        link_prefix="https://www.dawn.com/news/",
+        title_selector="h1.story__title, h2.story__title",
+        missing_title="No title found",
+        content_selector=".story__content p",
+        listing_strainer=SoupStrainer("article", class_=has_class("story")),
+        article_strainer=SoupStrainer(class_=has_class("story__title", "story__content")),
+    )
+
+
+register(_dawn_section("editorial", limit=3))
+register(_dawn_section("column", limit=4))
+
+register(SourceAdapter(
+    name="tribune-editorial",
+    source="tribune",
+    section="editorial",
+    listing_url="https://tribune.com.pk/editorial",
+    limit=6,
+    link_selector="li div.horiz-news3-caption a[href]",
+    link_prefix="https://tribune.com.pk/story/",
+    title_selector="div.story-box-section h1",
+    date_selector="div.left-authorbox span",
+    content_selector="span.story-text > p",
+    content_separator="\n\n",
+    content_drop_tags=("script", "style", "div"),
+    skip_empty_paragraphs=True,
+    listing_strainer=SoupStrainer("li"),
+    article_strainer=SoupStrainer(class_=has_class("story-box-section", "left-authorbox", "story-text")),
+    parse_bytes=True,
+))
+
+
+def _paradigmshift_section(slug, section):
+    return SourceAdapter(
+        name=f"paradigmshift-{slug}",
+        source="paradigmshift",
+        section=section,
+        listing_url=f"https://www.paradigmshift.com.pk/articles/{slug}-articles/",
+        limit=3,
+        card_selector="article.ast-article-post",
+        card_link_selector="h2.entry-title a",
+        card_date_selector="div.entry-meta span.published",
+        card_summary_selector="div.ast-excerpt-container",
+        listing_strainer=SoupStrainer("article", class_=has_class("ast-article-post")),
+        parse_bytes=True,
+    )
+
+
+register(_paradigmshift_section("international-relations", "International Relations"))
+register(_paradigmshift_section("pakistan", "Pakistan"))
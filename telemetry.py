@@ -0,0 +1,323 @@
+"""
+Per-request latency instrumentation.
+
+Every HTTP request to the app gets a request ID (taken from X-Request-ID or
+generated) and a Trace collecting timed spans from every layer it touches:
+
+    llm      one Gemini call, with prompt/completion token counts
+    tool     one tool call, with the tool name
+    agent    one agent iteration (a model turn and the tool calls it asked for)
+    fetch    one HTTP GET, with host, status and bytes
+    connect  opening a new connection (DNS, TCP and TLS), with host
+    rate_limit  waiting for the host's rate limit before a fetch, with host
+    parse    parsing one page, with source and page kind
+
+Spans are exported as Prometheus histograms on /metrics and, with
+TELEMETRY_JSON_LOGS=1, logged as one JSON line per request with its ID.
+Spans recorded outside a request (e.g. by the prefetch scheduler) still
+update the histograms. Cold start cost is reported once per process, per
+phase (import, agent_build, and the first /invoke request as first_request),
+on a gauge and on /stats.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+
+TELEMETRY_JSON_LOGS = os.getenv("TELEMETRY_JSON_LOGS", "0") == "1"
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_SECONDS = Histogram(
+    "news_agent_request_seconds", "Time to answer an HTTP request, by route template.", ["path", "status"],
+    buckets=_BUCKETS)
+# Path label of requests that matched no route, so scanners cannot add series.
+UNMATCHED_PATH = "other"
+# Routes whose first request is the "first_request" startup phase.
+FIRST_REQUEST_ROUTE = "/invoke"
+AGENT_ITERATION_SECONDS = Histogram(
+    "news_agent_agent_iteration_seconds", "Time of one agent iteration.", buckets=_BUCKETS)
+TOOL_SECONDS = Histogram(
+    "news_agent_tool_seconds", "Time of one tool call.", ["tool", "status"], buckets=_BUCKETS)
+LLM_SECONDS = Histogram(
+    "news_agent_llm_seconds", "Time of one LLM call.", ["model"], buckets=_BUCKETS)
+LLM_TOKENS = Counter(
+    "news_agent_llm_tokens", "Tokens sent to and generated by the LLM.", ["model", "kind"])
+FETCH_SECONDS = Histogram(
+    "news_agent_fetch_seconds", "Time of one HTTP GET, retries excluded.", ["host", "status"], buckets=_BUCKETS)
+FETCH_BYTES = Histogram(
+    "news_agent_fetch_bytes", "Size of fetched pages.", ["host"],
+    buckets=(1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6))
+CONNECT_SECONDS = Histogram(
+    "news_agent_connect_seconds", "Time to open a connection (DNS, TCP, TLS).", ["host"], buckets=_BUCKETS)
+PARSE_SECONDS = Histogram(
+    "news_agent_parse_seconds", "Time to parse one page.", ["source", "kind"], buckets=_BUCKETS)
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "news_agent_rate_limit_wait_seconds", "Time a fetch waited for the host's rate limit.", ["host"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+STARTUP_SECONDS = Gauge(
+    "news_agent_startup_seconds",
+    "Time of one startup phase: importing the app, building the agent, answering the first request.", ["phase"])
+
+logger = logging.getLogger("news_agent.telemetry")
+
+
+class Trace:
+    def __init__(self, request_id, method, path):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        # Route template ("/items/{id}") the request matched, set once it is answered.
+        self.route = None
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, name, started, duration, attrs):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((started - self.started) * 1000, 1),
+                "duration_ms": round(duration * 1000, 1),
+                **attrs,
+            })
+
+    def to_dict(self, status):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "spans": spans,
+        }
+
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def record(name, started, duration, **attrs):
+    """Adds a finished span to the current request's trace, if any."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(name, started, duration, attrs)
+
+
+@contextmanager
+def span(name, histogram=None, **attrs):
+    """
+    Times the block as a span of the current request and, if given, observes
+    its duration on `histogram` (labelled with `attrs`).
+    """
+    started = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        duration = time.perf_counter() - started
+        if histogram is not None:
+            histogram.labels(**{key: attrs[key] for key in histogram._labelnames}).observe(duration)
+        record(name, started, duration, **attrs)
+
+
+def observe_fetch(host, status, size, started, duration):
+    FETCH_SECONDS.labels(host=host, status=str(status)).observe(duration)
+    if size is not None:
+        FETCH_BYTES.labels(host=host).observe(size)
+    record("fetch", started, duration, host=host, status=status, bytes=size)
+
+
+def observe_connect(host, started, duration):
+    CONNECT_SECONDS.labels(host=host).observe(duration)
+    record("connect", started, duration, host=host)
+
+
+_startup = {}
+
+
+def observe_startup(phase, seconds):
+    STARTUP_SECONDS.labels(phase=phase).set(seconds)
+    _startup[phase] = round(seconds, 3)
+
+
+def startup():
+    return dict(_startup)
+
+
+def _usage(response):
+    """(prompt tokens, completion tokens) of an LLMResult, or (None, None)."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens"), usage.get("output_tokens")
+    usage = (response.llm_output or {}).get("usage_metadata") or (response.llm_output or {}).get("token_usage")
+    if usage:
+        return usage.get("input_tokens", usage.get("prompt_tokens")), usage.get("output_tokens", usage.get("completion_tokens"))
+    return None, None
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    Records LLM calls, tool calls and agent iterations of one agent run as
+    spans of `trace` (the request that started the run) and as histograms.
+    """
+
+    def __init__(self, trace=None):
+        self.trace = trace
+        self._started = {}
+        self._root_run_id = None
+        self._iteration_started = None
+        self._lock = threading.Lock()
+
+    def _record(self, name, started, duration, **attrs):
+        if self.trace is not None:
+            self.trace.add(name, started, duration, attrs)
+
+    def _start(self, run_id, **info):
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), info)
+
+    def _end(self, run_id):
+        with self._lock:
+            started, info = self._started.pop(run_id, (None, {}))
+        if started is None:
+            return None, 0.0, info
+        return started, time.perf_counter() - started, info
+
+    def _next_iteration(self, last=False):
+        now = time.perf_counter()
+        with self._lock:
+            started, self._iteration_started = self._iteration_started, None if last else now
+        if started is not None:
+            AGENT_ITERATION_SECONDS.observe(now - started)
+            self._record("agent", started, now - started)
+
+    # The executor calls the agent (model turn) once per iteration as a direct
+    # child chain of its own run; the tools it asked for follow. An iteration
+    # therefore lasts until the next agent call or the end of the run.
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._root_run_id = run_id
+        elif parent_run_id == self._root_run_id:
+            self._next_iteration()
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id == self._root_run_id:
+            self._next_iteration(last=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, model=model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, model=model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started, duration, info = self._end(run_id)
+        if started is None:
+            return
+        model = info["model"]
+        prompt_tokens, completion_tokens = _usage(response)
+        LLM_SECONDS.labels(model=model).observe(duration)
+        if prompt_tokens:
+            LLM_TOKENS.labels(model=model, kind="prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(model=model, kind="completion").inc(completion_tokens)
+        self._record("llm", started, duration, model=model,
+                     prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started, duration, info = self._end(run_id)
+        if started is not None:
+            self._record("llm", started, duration, model=info["model"], error=str(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, tool=(serialized or {}).get("name") or kwargs.get("name") or "unknown")
+
+    def _tool_done(self, run_id, status):
+        started, duration, info = self._end(run_id)
+        if started is not None:
+            TOOL_SECONDS.labels(tool=info["tool"], status=status).observe(duration)
+            self._record("tool", started, duration, tool=info["tool"], status=status)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._tool_done(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._tool_done(run_id, "error")
+
+
+def callbacks():
+    """Callback handlers to pass to an agent run for the current request."""
+    return [TelemetryCallbackHandler(current_trace.get())]
+
+
+class RequestTelemetryMiddleware:
+    """
+    ASGI middleware giving every HTTP request a request ID and a trace. The
+    request ID is echoed in the X-Request-ID response header. Streaming
+    responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers") or [])
+        rid = headers.get(b"x-request-id", b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        trace = Trace(rid, scope.get("method"), scope.get("path"))
+        token = current_trace.set(trace)
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers") or []) + [(b"x-request-id", rid.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            current_trace.reset(token)
+            # The router records the matched route in the (shared) scope.
+            trace.route = getattr(scope.get("route"), "path", None)
+            finish(trace, status)
+
+
+def finish(trace, status):
+    duration = time.perf_counter() - trace.started
+    REQUEST_SECONDS.labels(path=trace.route or UNMATCHED_PATH, status=str(status)).observe(duration)
+    # Health checks and 404s often come first; the phase is about the first query.
+    if "first_request" not in _startup and (trace.route or "").startswith(FIRST_REQUEST_ROUTE):
+        observe_startup("first_request", duration)
+    if TELEMETRY_JSON_LOGS:
+        logger.info(json.dumps(trace.to_dict(status), default=str))
+
+
+def metrics():
+    """Returns (body, content type) of the Prometheus exposition."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def configure_logging():
+    # JSON lines go to stderr as-is, so log shippers can parse them.
+    if TELEMETRY_JSON_LOGS and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False